@@ -0,0 +1,49 @@
+"""Measure construction time and memory per object for Thing, Tag and GameObject"""
+
+import sys
+import tracemalloc
+
+from os import path
+from timeit import timeit
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from grave.Core import Thing, Tag, GameObject
+
+
+COUNT = 100_000
+
+CASES = {
+    "Thing()": lambda: Thing(),
+    "Tag('enemy')": lambda: Tag("enemy"),
+    "GameObject()": lambda: GameObject(),
+    "GameObject('named')": lambda: GameObject("named"),
+    "GameObject().thing_id()": lambda: GameObject().thing_id(),
+}
+
+
+def bytes_per_object(factory, count : int = COUNT) -> float:
+    """Average traced memory held by each of count live objects"""
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = [factory() for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    held = after - before - sys.getsizeof(objects)
+    del objects
+
+    return held / count
+
+
+def main() -> None:
+    print(f"{'case':<28}{'us/object':>12}{'bytes/object':>15}")
+
+    for name, factory in CASES.items():
+        seconds = timeit(factory, number=COUNT)
+        print(f"{name:<28}{seconds / COUNT * 1e6:>12.3f}{bytes_per_object(factory):>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
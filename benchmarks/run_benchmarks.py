@@ -0,0 +1,688 @@
+"""Headless benchmarks for the engine's hot paths.
+
+Runs under SDL's dummy video driver. Results can be saved as a baseline, and later runs
+fail when any benchmark gets slower than the baseline by more than the threshold.
+
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+from statistics import median
+from time import perf_counter
+from typing import Callable
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+
+# Every benchmark builds its fixture and returns (operation, operations per call).
+BENCHMARKS : dict[str, Callable[[], tuple[Callable[[], None], int]]] = dict()
+
+
+def benchmark(name : str):
+    """Register a benchmark under name"""
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def _screen(width : int = 1280, height : int = 720):
+    pygame.init()
+    return pygame.display.set_mode((width, height))
+
+
+def _image(width : int, height : int, color, circle : bool = False):
+    image = pygame.Surface((width, height), pygame.SRCALPHA)
+
+    if circle:
+        pygame.draw.circle(image, color, (width // 2, height // 2), min(width, height) // 2)
+    else:
+        image.fill(color)
+
+    return image
+
+
+@benchmark("widget_tree_frame")
+def widget_tree_frame():
+    """update and draw a chain of 9 nested windows that each hold 3 more leaf windows"""
+
+    from grave.Gui import StaticWindowWidget
+
+    screen = _screen()
+
+    def build(depth : int):
+        size = max(8, 512 >> (8 - depth))
+        window = StaticWindowWidget(surface=screen, image=_image(size, size, (40, 40, 40, 255)))
+
+        if depth > 0:
+            for child in range(4):
+                window.add_widget(build(depth - 1) if child == 0 else StaticWindowWidget(surface=screen, image=_image(8, 8, (200, 0, 0, 255)), position=(child * 2, child * 2)))
+
+        return window
+
+    root = build(8)
+
+    def frame():
+        root.update()
+        root.draw()
+
+    return frame, 1
+
+
+@benchmark("mask_clipping")
+def mask_clipping():
+    """move 64 round children across a round window so every child is clipped again each frame"""
+
+    from grave.Gui import StaticWindowWidget
+
+    screen = _screen()
+    window = StaticWindowWidget(surface=screen, image=_image(512, 512, (40, 40, 40, 255), circle=True), position=(100, 100))
+    children = [
+        StaticWindowWidget(surface=screen, image=_image(64, 64, (0, 200, 0, 255), circle=True), position=((i % 8) * 60, (i // 8) * 60))
+        for i in range(64)
+        ]
+
+    for child in children:
+        window.add_widget(child)
+
+    offset = [0]
+
+    def frame():
+        offset[0] = 1 - offset[0]
+        for child in children:
+            child.position = (child.x + (1 if offset[0] else -1), child.y)
+        window.update()
+        window.draw()
+
+    return frame, 1
+
+
+@benchmark("rect_clipping")
+def rect_clipping():
+    """move 64 round children across a rectangular window, clipping them to its rect"""
+
+    from grave.Gui import StaticWindowWidget
+
+    screen = _screen()
+    window = StaticWindowWidget(surface=screen, image=_image(512, 512, (40, 40, 40, 255)), position=(100, 100))
+    children = [
+        StaticWindowWidget(surface=screen, image=_image(64, 64, (0, 200, 0, 255), circle=True), position=((i % 8) * 70 - 32, (i // 8) * 70 - 32))
+        for i in range(64)
+        ]
+
+    for child in children:
+        window.add_widget(child)
+
+    offset = [0]
+
+    def frame():
+        offset[0] = 1 - offset[0]
+        for child in children:
+            child.position = (child.x + (1 if offset[0] else -1), child.y)
+        window.update()
+        window.draw()
+
+    return frame, 1
+
+
+@benchmark("signal_emit_1000_slots")
+def signal_emit():
+    """emit a signal with 1000 connected slots"""
+
+    from grave.Core import Signal
+
+    emitted = Signal(None)
+    hits = [0]
+
+    def slot():
+        hits[0] += 1
+
+    # A slot is only connected once, so connect 1000 distinct callables.
+    for _ in range(1000):
+        Signal.connect(emitted, lambda: slot())
+
+    return emitted.emit, 1
+
+
+@benchmark("gameobject_construction")
+def gameobject_construction():
+    """construct 1000 GameObjects"""
+
+    from grave.Core import GameObject
+
+    def construct():
+        for _ in range(1000):
+            GameObject()
+
+    return construct, 1000
+
+
+def _mixed_objects(count : int):
+    """count GameObjects, every fourth of which is a sprite"""
+
+    from grave.Core import GameObject
+    from grave.Implements import ImplementsPosition, ImplementsSprite
+
+    class Sprite(GameObject, ImplementsPosition, ImplementsSprite):
+        pass
+
+    return [Sprite() if i % 4 == 0 else GameObject() for i in range(count)], ImplementsSprite
+
+
+def _static_panel(layer_cached : bool):
+    """a window holding 48 small windows that never change"""
+
+    from grave.Gui import StaticWindowWidget
+
+    screen = _screen()
+    panel = StaticWindowWidget(surface=screen, image=_image(400, 300, (40, 40, 40, 255)), position=(100, 100))
+
+    for i in range(48):
+        panel.add_widget(StaticWindowWidget(surface=screen, image=_image(40, 30, (0, 120, 200, 255), circle=True), position=((i % 8) * 48 + 8, (i // 8) * 48 + 8)))
+
+    panel.layer_cached = layer_cached
+
+    def frame():
+        panel.update()
+        panel.draw()
+
+    return frame, 1
+
+
+@benchmark("static_panel_48")
+def static_panel():
+    """update and draw a window holding 48 unchanging windows"""
+
+    return _static_panel(False)
+
+
+@benchmark("static_panel_48_layer")
+def static_panel_layer():
+    """update and draw the same window from a cached layer"""
+
+    return _static_panel(True)
+
+
+def _icon_grid(batching : bool, atlas : bool):
+    from grave.Gui import Widget, StaticWindowWidget
+    from grave.Render import TextureAtlas
+
+    screen = _screen()
+    grid = StaticWindowWidget(surface=screen, image=_image(1200, 640, (40, 40, 40, 255)), position=(40, 40))
+    packer = TextureAtlas() if atlas else None
+
+    for i in range(600):
+        icon = StaticWindowWidget(surface=screen, image=_image(16, 16, (i % 256, 120, 200, 255), circle=True), position=((i % 40) * 30 + 4, (i // 40) * 40 + 4))
+        grid.add_widget(icon)
+        icon.atlas = packer
+
+    grid.update()
+
+    def frame():
+        Widget.set_batching(batching)
+        grid.draw()
+        Widget.set_batching(True)
+
+    return frame, 1
+
+
+@benchmark("icons_600_unbatched")
+def icons_unbatched():
+    """draw a window holding 600 small icons, one blit call per icon"""
+
+    return _icon_grid(False, False)
+
+
+@benchmark("icons_600")
+def icons():
+    """draw the same icons with one Surface.blits call"""
+
+    return _icon_grid(True, False)
+
+
+@benchmark("icons_600_atlas")
+def icons_atlas():
+    """draw the same icons with one Surface.blits call from a texture atlas"""
+
+    return _icon_grid(True, True)
+
+
+@benchmark("implements_filter_1000")
+def implements_filter():
+    """find the sprites among 1000 objects with <<implements>>"""
+
+    from grave.Utils import implements
+
+    objects, ImplementsSprite = _mixed_objects(1000)
+
+    def find():
+        return [thing for thing in objects if thing <<implements>> ImplementsSprite]
+
+    return find, 1
+
+
+@benchmark("registry_instances_1000")
+def registry_instances():
+    """find the sprites among 1000 objects through the capability registry"""
+
+    from grave.Capabilities import default_capability_registry
+    from grave.Implements import ImplementsSprite
+
+    default_capability_registry.watch(ImplementsSprite)
+    objects, _ = _mixed_objects(1000)
+
+    def find():
+        # objects is referenced here so the sprites stay alive.
+        return default_capability_registry.instances(ImplementsSprite) if objects else []
+
+    return find, 1
+
+
+def _implements_sprite(compiled : bool):
+    """a sprite made of the Python implements, or of the compiled ones when the extension is built"""
+
+    if compiled:
+        from grave.Utils import CImplements2DMove as Move, CImplementsSprite as Sprite
+    else:
+        from grave.Implements import Implements2DMove as Move, ImplementsSprite as Sprite
+
+    class MovingSprite(Move, Sprite):
+        pass
+
+    sprite = MovingSprite()
+    sprite.set_position(10, 20)
+    sprite._image = pygame.Surface((32, 32))
+
+    return sprite
+
+
+def _implements_case(compiled : bool, case : str):
+    sprite = _implements_sprite(compiled)
+    operation = {
+        "move": lambda: sprite.move(1.5, -0.5),
+        "position": lambda: sprite.position,
+        "rect": lambda: sprite.rect,
+        }[case]
+    calls = range(1000)
+
+    def run():
+        for _ in calls:
+            operation()
+
+    return run, 1000
+
+
+@benchmark("implements_move_1000")
+def implements_move():
+    """move a sprite 1000 times, made of the Python implements"""
+
+    return _implements_case(False, "move")
+
+
+@benchmark("cimplements_move_1000")
+def cimplements_move():
+    """move a sprite 1000 times, made of the compiled implements, or the Python ones without the extension"""
+
+    return _implements_case(True, "move")
+
+
+@benchmark("implements_position_1000")
+def implements_position():
+    """read the position of a sprite 1000 times, made of the Python implements"""
+
+    return _implements_case(False, "position")
+
+
+@benchmark("cimplements_position_1000")
+def cimplements_position():
+    """read the position of a sprite 1000 times, made of the compiled implements, or the Python ones without the extension"""
+
+    return _implements_case(True, "position")
+
+
+@benchmark("implements_rect_1000")
+def implements_rect():
+    """build the rect of a sprite 1000 times, made of the Python implements"""
+
+    return _implements_case(False, "rect")
+
+
+@benchmark("cimplements_rect_1000")
+def cimplements_rect():
+    """build the rect of a sprite 1000 times, made of the compiled implements, or the Python ones without the extension"""
+
+    return _implements_case(True, "rect")
+
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _startup(code : str):
+    """run code in a fresh interpreter, so nothing is imported or initialized before it"""
+
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYTHONPATH=_ROOT)
+    command = [sys.executable, "-c", textwrap.dedent(code)]
+
+    def run():
+        subprocess.run(command, check=True, env=env, cwd=_ROOT, capture_output=True)
+
+    return run, 1
+
+
+def _first_frame(subsystems):
+    scene_dir = tempfile.TemporaryDirectory()
+
+    with open(os.path.join(scene_dir.name, "first_scene.py"), "w") as scene_file:
+        scene_file.write(textwrap.dedent("""
+            from grave.Game import Scene
+
+            class FirstScene(Scene):
+                def update_scene(self):
+                    self.is_valid = False
+
+                def end_scene(self):
+                    return ["QUIT_GAME"]
+            """))
+
+    run, operations = _startup(f"""
+        from grave.Game import SceneDictVideogame
+
+        SceneDictVideogame(
+            640,
+            480,
+            scene_dir_list=[{scene_dir.name!r}],
+            game_module_override="grave_startup_scenes",
+            global_things={{"frame_rate": 0}},
+            subsystems={subsystems!r},
+            ).run()
+        """)
+
+    def first_frame():
+        # scene_dir is referenced here so the directory lives as long as the benchmark, and is removed after it
+        if scene_dir is not None:
+            run()
+
+    return first_frame, operations
+
+
+@benchmark("startup_import_grave")
+def startup_import_grave():
+    """start an interpreter and import grave"""
+
+    return _startup("import grave")
+
+
+@benchmark("startup_import_core")
+def startup_import_core():
+    """start an interpreter and import GameObject and Signal"""
+
+    return _startup("from grave.Core import GameObject, Signal")
+
+
+@benchmark("startup_import_game")
+def startup_import_game():
+    """start an interpreter and import grave.Game"""
+
+    return _startup("import grave.Game")
+
+
+@benchmark("startup_first_frame")
+def startup_first_frame():
+    """start an interpreter and run a game with every subsystem for one frame"""
+
+    return _first_frame(None)
+
+
+@benchmark("startup_first_frame_display")
+def startup_first_frame_display():
+    """start an interpreter and run a game with only the display for one frame"""
+
+    return _first_frame(())
+
+
+@benchmark("collision_2000")
+def collision():
+    """move 2000 round sprites and find their collisions with a CollisionWorld"""
+
+    import random
+
+    from grave.Collision import CollisionWorld
+    from grave.Implements import Implements2DMove, ImplementsSprite
+
+    class Ball(Implements2DMove, ImplementsSprite):
+        pass
+
+    generator = random.Random(0)
+    image = _image(16, 16, (255, 255, 255, 255), circle=True)
+    mask = pygame.mask.from_surface(image)
+    world = CollisionWorld(cell_size=32)
+    balls = []
+
+    for _ in range(2000):
+        ball = Ball()
+        ball._image = image
+        ball.set_position(generator.randrange(1280), generator.randrange(720))
+        world.add(ball, mask)
+        balls.append((ball, generator.choice((-2, -1, 1, 2)), generator.choice((-2, -1, 1, 2))))
+
+    def frame():
+        for ball, d_x, d_y in balls:
+            ball.move(d_x, d_y)
+        world.update()
+
+    return frame, 1
+
+
+def _spinners(count : int):
+    """count spinning sprites spread over the screen"""
+
+    from grave.Implements import Implements2DMove, ImplementsSprite
+
+    class Spinner(Implements2DMove, ImplementsSprite):
+        pass
+
+    image = _image(48, 24, (255, 200, 0, 255))
+    spinners = []
+
+    for i in range(count):
+        spinner = Spinner()
+        spinner._image = image
+        spinner.set_position((i * 37) % 1240, (i * 53) % 690)
+        spinner.angle = i * 0.1
+        spinners.append(spinner)
+
+    return spinners
+
+
+@benchmark("rotate_per_frame_300")
+def rotate_per_frame():
+    """rotate and blit 300 spinning sprites with pygame.transform.rotate every frame"""
+
+    from math import degrees
+
+    screen = _screen()
+    spinners = _spinners(300)
+
+    def frame():
+        for spinner in spinners:
+            spinner.rotate(0.05)
+            rotated = pygame.transform.rotate(spinner._image, degrees(spinner.angle))
+            screen.blit(rotated, rotated.get_rect(center=spinner.rect.center))
+
+    return frame, 1
+
+
+@benchmark("rotation_cache_300")
+def rotation_cache():
+    """blit 300 spinning sprites through a RotationCache"""
+
+    from grave.Render import RotationCache
+
+    screen = _screen()
+    spinners = _spinners(300)
+    cache = RotationCache(steps=72)
+
+    def frame():
+        for spinner in spinners:
+            spinner.rotate(0.05)
+            cache.blit(screen, spinner._image, spinner.position, spinner.angle)
+
+    return frame, 1
+
+
+@benchmark("scene_switch")
+def scene_switch():
+    """run a SceneDictVideogame that switches between two scenes 100 times"""
+
+    from grave.Game import SceneDictVideogame
+
+    scene_dir = tempfile.TemporaryDirectory()
+
+    for name, other in (("ping", "PongScene"), ("pong", "PingScene")):
+        with open(os.path.join(scene_dir.name, f"{name}_scene.py"), "w") as scene_file:
+            scene_file.write(textwrap.dedent(f"""
+                from grave.Game import Scene
+
+                class {name.capitalize()}Scene(Scene):
+                    def update_scene(self):
+                        self.is_valid = False
+
+                    def end_scene(self):
+                        switches = self._global_things["switches"]
+                        switches[0] += 1
+                        if switches[0] >= switches[1]:
+                            return ["QUIT_GAME"]
+                        return ["CHANGE_SCENE", "{other}"]
+                """))
+
+    switches = 100
+
+    def run():
+        game = SceneDictVideogame(
+            320,
+            240,
+            scene_dir_list=[scene_dir.name],
+            game_module_override="grave_benchmark_scenes",
+            global_things={"frame_rate": 0, "switches": [0, switches]},
+            )
+        game.run()
+
+    return run, switches
+
+
+def run_benchmark(name : str, repeat : int, min_seconds : float) -> dict[str, float]:
+    """Time a benchmark and return its median seconds per operation"""
+
+    operation, operations = BENCHMARKS[name]()
+
+    operation()
+
+    calls = 1
+    start = perf_counter()
+    operation()
+    elapsed = perf_counter() - start
+
+    if elapsed < min_seconds:
+        calls = max(1, int(min_seconds / max(elapsed, 1e-9)))
+
+    timings = []
+
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(calls):
+            operation()
+        timings.append((perf_counter() - start) / (calls * operations))
+
+    seconds = median(timings)
+
+    return {"seconds_per_op": seconds, "ops_per_sec": 1 / seconds if seconds else float("inf")}
+
+
+def compare(results : dict, baseline : dict, threshold : float) -> list[str]:
+    """List every benchmark that got slower than its baseline by more than threshold"""
+
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        ratio = result["seconds_per_op"] / baseline[name]["seconds_per_op"]
+
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {ratio:.2f}x the baseline time")
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all of them by default")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per benchmark")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="minimum length of a timed round")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--save-baseline", help="write the results as a baseline to this JSON file")
+    parser.add_argument("--baseline", help="compare the results with this baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown against the baseline, 0.25 is 25%%")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, setup in BENCHMARKS.items():
+            print(f"{name:<28}{setup.__doc__}")
+        return 0
+
+    names = args.names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = dict()
+
+    print(f"{'benchmark':<28}{'ms/op':>12}{'ops/s':>14}")
+
+    for name in names:
+        results[name] = run_benchmark(name, args.repeat, args.min_seconds)
+        print(f"{name:<28}{results[name]['seconds_per_op'] * 1000:>12.4f}{results[name]['ops_per_sec']:>14.1f}")
+
+    pygame.quit()
+
+    for file_path in (args.output, args.save_baseline):
+        if file_path is not None:
+            with open(file_path, "w") as json_file:
+                json.dump(results, json_file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as json_file:
+            regressions = compare(results, json.load(json_file), args.threshold)
+
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+
+        print("\nNo regressions.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""A shared cache of decoded images"""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from os import path
+from threading import Lock
+from typing import Union
+
+import pygame
+
+from .Core import Thing, Signal, SignalQueue, default_signal_queue
+from .Masks import MaskCache
+
+
+class AssetHandle(Thing):
+    """An image that may still be loading. Until it is loaded, surface is the manager's placeholder.
+
+    loaded is queued on the manager's signal queue, and is emitted for handles to cached images too."""
+
+    loaded = Signal(None, queued=True)
+
+    def __init__(self, asset_path : str, placeholder : pygame.Surface, future : Future = None, queue : SignalQueue = None):
+        """Initialize a handle for the image at asset_path whose loaded signal is queued on queue"""
+
+        super().__init__()
+
+        self.loaded.set_queued(True, queue)
+
+        self._path : str = asset_path
+        self._placeholder : pygame.Surface = placeholder
+        self._surface : Union[pygame.Surface, None] = None
+        self._future : Union[Future, None] = future
+
+    @property
+    def path(self) -> str:
+        """The path of the image"""
+
+        return self._path
+
+    @property
+    def ready(self) -> bool:
+        """Has the image finished loading?"""
+
+        return self._surface is not None
+
+    @property
+    def surface(self) -> pygame.Surface:
+        """The loaded image, or the placeholder while it is loading"""
+
+        return self._placeholder if self._surface is None else self._surface
+
+    def wait(self, timeout : Union[float, None] = None) -> pygame.Surface:
+        """Block until the image is loaded and return it"""
+
+        if self._surface is None and self._future is not None:
+            self._future.result(timeout)
+
+        return self.surface
+
+    def _set_surface(self, surface : pygame.Surface) -> None:
+        self._surface = surface
+        self.loaded.emit(self)
+
+
+class AssetManager(Thing):
+    """Decodes each image once, keeps the most recently used ones within a memory budget and loads images on a thread pool"""
+
+    def __init__(
+        self,
+        budget_bytes : int = 256 * 1024 * 1024,
+        workers : int = 4,
+        placeholder : pygame.Surface = None,
+        mask_cache : MaskCache = None,
+        signal_queue : SignalQueue = None,
+        ):
+        """Initialize an empty asset manager"""
+
+        super().__init__()
+
+        self._budget : int = budget_bytes
+        self._workers : int = workers
+        self._placeholder : Union[pygame.Surface, None] = placeholder
+        self._signal_queue : SignalQueue = default_signal_queue if signal_queue is None else signal_queue
+
+        self._cache : OrderedDict[tuple[str, bool], pygame.Surface] = OrderedDict()
+        self._loading : dict[tuple[str, bool], AssetHandle] = dict()
+        self._bytes : int = 0
+        self._lock : Lock = Lock()
+        self._executor : Union[ThreadPoolExecutor, None] = None
+
+        self._mask_cache : MaskCache = MaskCache() if mask_cache is None else mask_cache
+        self._masks : dict[tuple[str, int], pygame.mask.Mask] = dict()
+
+        self._hits : int = 0
+        self._misses : int = 0
+        self._evictions : int = 0
+
+    @property
+    def placeholder(self) -> pygame.Surface:
+        """The surface handed out while an image is loading"""
+
+        if self._placeholder is None:
+            self._placeholder = pygame.Surface((1, 1), pygame.SRCALPHA)
+
+        return self._placeholder
+
+    @property
+    def signal_queue(self) -> SignalQueue:
+        """The queue the loaded signals of handles are queued on"""
+
+        return self._signal_queue
+
+    @signal_queue.setter
+    def signal_queue(self, queue : SignalQueue) -> None:
+        """Setter for signal_queue. Handles made before keep their queue"""
+
+        self._signal_queue = queue
+
+    @property
+    def budget(self) -> int:
+        """How many bytes of pixels the cache may hold"""
+
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget_bytes : int) -> None:
+        """Setter for budget. Shrinking it evicts images right away"""
+
+        with self._lock:
+            self._budget = budget_bytes
+            self._evict()
+
+    def stats(self) -> dict[str, int]:
+        """Cache hits, misses, evictions and the bytes currently held"""
+
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "bytes": self._bytes,
+            "images": len(self._cache),
+            }
+
+    @staticmethod
+    def _key(asset_path : str, alpha : bool) -> tuple[str, bool]:
+        return (path.abspath(asset_path), alpha)
+
+    @staticmethod
+    def _decode(asset_path : str, alpha : bool) -> pygame.Surface:
+        """Load an image and convert it to the display format when there is a display"""
+
+        surface = pygame.image.load(asset_path)
+
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+
+        return surface
+
+    def _evict(self) -> None:
+        """Drop least recently used images until the cache fits the budget. Call with the lock held"""
+
+        while self._bytes > self._budget and len(self._cache) > 1:
+            _, surface = self._cache.popitem(last=False)
+            self._bytes -= surface.get_pitch() * surface.get_height()
+            self._evictions += 1
+
+    def _store(self, key : tuple[str, bool], surface : pygame.Surface) -> pygame.Surface:
+        """Add a decoded image to the cache. Call with the lock held"""
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        self._cache[key] = surface
+        self._bytes += surface.get_pitch() * surface.get_height()
+        self._evict()
+
+        return surface
+
+    def _cached(self, key : tuple[str, bool]) -> Union[pygame.Surface, None]:
+        """Get an image from the cache and mark it as recently used. Call with the lock held"""
+
+        surface = self._cache.get(key)
+
+        if surface is not None:
+            self._cache.move_to_end(key)
+            self._hits += 1
+
+        return surface
+
+    def image(self, asset_path : str, alpha : bool = True) -> pygame.Surface:
+        """Get the decoded image at asset_path, loading it now if it is not cached"""
+
+        key = self._key(asset_path, alpha)
+
+        with self._lock:
+            surface = self._cached(key)
+            handle = self._loading.get(key)
+
+        if surface is not None:
+            return surface
+
+        if handle is not None:
+            return handle.wait()
+
+        surface = self._decode(asset_path, alpha)
+
+        with self._lock:
+            self._misses += 1
+            return self._store(key, surface)
+
+    @property
+    def mask_cache(self) -> MaskCache:
+        """The on-disk cache masks are loaded from"""
+
+        return self._mask_cache
+
+    def mask(self, asset_path : str, threshold : int = 127) -> pygame.mask.Mask:
+        """Get the collision mask of the image at asset_path from the on-disk mask cache.
+
+        Masks are shared, so copy one before drawing on it."""
+
+        key = (path.abspath(asset_path), threshold)
+        mask = self._masks.get(key)
+
+        if mask is None:
+            with self._lock:
+                surface = self._cache.get((key[0], True))
+
+            mask = self._masks[key] = self._mask_cache.from_file(asset_path, threshold, surface)
+
+        return mask
+
+    def load(self, asset_path : str, alpha : bool = True) -> AssetHandle:
+        """Start loading the image at asset_path on the thread pool and return a handle to it right away.
+
+        The handle's loaded signal is queued on signal_queue, so its slots run on the thread that drains that queue.
+        It is emitted for images that were already cached too."""
+
+        key = self._key(asset_path, alpha)
+
+        with self._lock:
+            surface = self._cached(key)
+
+            if surface is not None:
+                # loaded is queued, so its slots still run when they are connected after load returns
+                handle = AssetHandle(asset_path, self.placeholder, queue=self._signal_queue)
+                handle._set_surface(surface)
+                return handle
+
+            handle = self._loading.get(key)
+
+            if handle is not None:
+                return handle
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="grave-assets")
+
+            handle = AssetHandle(asset_path, self.placeholder, queue=self._signal_queue)
+            self._loading[key] = handle
+            handle._future = self._executor.submit(self._load, key, asset_path, alpha, handle)
+
+        return handle
+
+    def _load(self, key : tuple[str, bool], asset_path : str, alpha : bool, handle : AssetHandle) -> None:
+        try:
+            surface = self._decode(asset_path, alpha)
+
+            with self._lock:
+                self._misses += 1
+                surface = self._store(key, surface)
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+
+        handle._set_surface(surface)
+
+    def preload(self, asset_paths, alpha : bool = True) -> list[AssetHandle]:
+        """Start loading every image in asset_paths"""
+
+        return [self.load(asset_path, alpha) for asset_path in asset_paths]
+
+    def evict(self, asset_path : str, alpha : bool = True) -> bool:
+        """Drop an image from the cache"""
+
+        with self._lock:
+            surface = self._cache.pop(self._key(asset_path, alpha), None)
+
+            if surface is None:
+                return False
+
+            self._bytes -= surface.get_pitch() * surface.get_height()
+
+        return True
+
+    def clear(self) -> None:
+        """Drop every cached image"""
+
+        with self._lock:
+            self._cache.clear()
+            self._bytes = 0
+
+        self._masks.clear()
+
+    def shutdown(self) -> None:
+        """Wait for running loads and stop the thread pool"""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __contains__(self, asset_path : str) -> bool:
+        return self._key(asset_path, True) in self._cache or self._key(asset_path, False) in self._cache
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -1,13 +1,195 @@
-"""implements are mixins that add functionality to an object"""
+"""implements are mixins that add functionality to an object
 
+These are compiled versions of the implements in grave.Implements with the same API.
+Positions and angles are stored as C doubles. Whole positions read back as ints, and move truncates like the Python implements."""
+
+import cython
 from cython import cclass
 
+from pygame import Rect
+
+from .Capabilities import default_capability_registry
+
 @cclass
 class CImplement:
-    """The implement base class does not have a Thing ID"""
+    """The implement base class does not have a Thing ID.
+
+    Instances of the implements default_capability_registry watches are tracked."""
+
+    __weakref__ = cython.declare(object)
+
+    def __cinit__(self, *args, **kwargs):
+        default_capability_registry.track(self)
 
     def __init__(self, *args, **kwargs):
         self.validate()
 
     def validate(self):
         pass
+
+
+@cython.cfunc
+@cython.inline
+def _number(value : cython.double) -> object:
+    """value as an int when it is whole, like the Python implements return what was assigned"""
+
+    whole : cython.long = cython.cast(cython.long, value)
+
+    if whole == value:
+        return whole
+
+    return value
+
+
+@cclass
+class CImplementsPosition(CImplement):
+    """Implment a 2D position vector"""
+
+    _x = cython.declare(cython.double, visibility="public")
+    _y = cython.declare(cython.double, visibility="public")
+
+    def get_x(self):
+        return _number(self._x)
+
+    def get_y(self):
+        return _number(self._y)
+
+    def set_x(self, x : cython.double) -> None:
+        self._x = x
+
+    def set_y(self, y : cython.double) -> None:
+        self._y = y
+
+    def set_position(self, x : cython.double, y : cython.double) -> None:
+        """set X and Y"""
+
+        self._x = x
+        self._y = y
+
+    @property
+    def position(self) -> tuple[int, int]:
+        """Get X and Y as a tuple"""
+
+        return (cython.cast(cython.long, self._x), cython.cast(cython.long, self._y))
+
+    @position.setter
+    def position(self, xy : tuple[int, int]) -> None:
+        """set X and Y"""
+
+        self._x, self._y = xy
+
+    @property
+    def x(self):
+        """get the x position"""
+
+        return _number(self._x)
+
+    @x.setter
+    def x(self, X : cython.double) -> None:
+        """set the x position"""
+
+        self.set_x(X)
+
+    @property
+    def y(self):
+        """get the y position"""
+
+        return _number(self._y)
+
+    @y.setter
+    def y(self, Y : cython.double) -> None:
+        """set the y position"""
+
+        self.set_y(Y)
+
+
+@cclass
+class CImplements2DMove(CImplementsPosition):
+    """implements methods to manipulate position"""
+
+    _angle = cython.declare(cython.double, visibility="public")
+
+    def move(self, x : cython.double, y : cython.double) -> None:
+        """move in x and y direction"""
+
+        self._x = cython.cast(cython.long, self._x + x)
+        self._y = cython.cast(cython.long, self._y + y)
+
+    def move_and_roate(self, x : cython.double, y : cython.double, theta_rads : cython.double) -> None:
+        """move and rotate at the same time"""
+
+        self._x = cython.cast(cython.long, self._x + x)
+        self._y = cython.cast(cython.long, self._y + y)
+        self._angle += theta_rads
+
+    def move_x(self, x : cython.double) -> None:
+        """move in the x direction"""
+
+        self._x = cython.cast(cython.long, self._x + x)
+
+    def move_y(self, y : cython.double) -> None:
+        """move in the y direction"""
+
+        self._y = cython.cast(cython.long, self._y + y)
+
+    def rotate(self, theta_rads : cython.double) -> None:
+        """rotate in the direction"""
+
+        self._angle += theta_rads
+
+    @property
+    def angle(self) -> float:
+        """get the angle of rotation"""
+
+        return self._angle
+
+    @angle.setter
+    def angle(self, theta_rads : cython.double) -> None:
+        """set the angle of rotation"""
+
+        self._angle = theta_rads
+
+
+@cclass
+class CImplementsSprite(CImplement):
+    """Object2D is a 2D object that can be drawn to the screen.
+
+    This adds no C fields, so it can be mixed with CImplements2DMove. _surface and _image are class attributes
+    that Python subclasses set in their instance dict. A bare CImplementsSprite has no instance dict and cannot set them."""
+
+    _surface = None
+    _image = None
+
+    @property
+    def rect(self) -> Rect:
+        image = self._image
+
+        if image is None:
+            return None
+
+        width, height = image.get_size()
+
+        # mixed with a compiled position, read it from its C fields rather than through the x and y properties
+        if isinstance(self, CImplementsPosition):
+            position : CImplementsPosition = self
+            return Rect(cython.cast(cython.long, position._x), cython.cast(cython.long, position._y), width, height)
+
+        return Rect(self.x, self.y, width, height)
+
+    def draw(self) -> None:
+        """Implementation of Draw is required."""
+
+        raise NotImplementedError
+
+    def update(self) -> None:
+        """Update the Object2D in the scene"""
+
+        raise NotImplementedError
+
+    def collide(self) -> list[Rect]:
+        """return a list of rects that determine collisions"""
+
+        raise NotImplementedError
+
+
+default_capability_registry.register(CImplement)
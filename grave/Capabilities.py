@@ -0,0 +1,155 @@
+"""A registry of which types and objects implement which implements"""
+
+from typing import Any, Union
+from weakref import WeakSet
+
+from .Core import Thing
+
+
+class CapabilityRegistry(Thing):
+    """Caches which implements a type has and keeps track of the live objects of the implements it watches.
+
+    Every class in an object's MRO that derives from a registered base counts as an implement,
+    so instances() works for mixins like ImplementsSprite as well as for concrete classes.
+    Only watched implements are tracked, so creating objects of other implements costs a single lookup."""
+
+    def __init__(self):
+        """Initialize a registry without any implement bases"""
+
+        super().__init__()
+
+        self._bases : tuple[type, ...] = ()
+        self._valid : dict[type, bool] = dict()
+        self._implements : dict[tuple[type, type], bool] = dict()
+        self._capabilities : dict[type, tuple[type, ...]] = dict()
+        self._instances : dict[type, WeakSet] = dict()
+        self._tracked : dict[type, tuple[WeakSet, ...]] = dict()
+
+    def register(self, base : type) -> None:
+        """Count base and every class derived from it as an implement"""
+
+        if base not in self._bases:
+            self._bases += (base,)
+            self.clear_cache()
+
+    def bases(self) -> tuple[type, ...]:
+        return self._bases
+
+    def clear_cache(self) -> None:
+        """Forget the cached answers, for example after a class's __bases__ were reassigned"""
+
+        self._valid.clear()
+        self._implements.clear()
+        self._capabilities.clear()
+        self._tracked.clear()
+
+    def is_implement(self, implement : type) -> bool:
+        """Is implement derived from a registered base?"""
+
+        valid = self._valid.get(implement)
+
+        if valid is None:
+            valid = self._valid[implement] = isinstance(implement, type) and issubclass(implement, self._bases)
+
+        return valid
+
+    def cached(self, cls : type, implement : type) -> Union[bool, None]:
+        """The cached answer to whether cls implements implement, or None when there is none yet"""
+
+        return self._implements.get((cls, implement))
+
+    def implements(self, subject : Any, implement : type) -> bool:
+        """Does subject, an object or a class, implement implement? The answer is cached per (type, implement) pair"""
+
+        cls = subject if type(subject) == type else type(subject)
+        key = (cls, implement)
+        result = self._implements.get(key)
+
+        if result is None:
+            if not self.is_implement(implement):
+                raise ValueError(f"Supplied implement \'{getattr(implement, '__name__', implement)}\' is not of Implement type")
+
+            result = self._implements[key] = implement in cls.__mro__
+
+        return result
+
+    def capabilities(self, cls : type) -> tuple[type, ...]:
+        """Every implement in the MRO of cls"""
+
+        capabilities = self._capabilities.get(cls)
+
+        if capabilities is None:
+            capabilities = self._capabilities[cls] = tuple(base for base in cls.__mro__ if self.is_implement(base))
+
+        return capabilities
+
+    def watch(self, implement : type) -> None:
+        """Track the objects of implement created from now on"""
+
+        if implement in self._instances:
+            return
+
+        if not self.is_implement(implement):
+            raise ValueError(f"Supplied implement \'{getattr(implement, '__name__', implement)}\' is not of Implement type")
+
+        self._instances[implement] = WeakSet()
+        self._tracked.clear()
+
+    def watched(self) -> tuple[type, ...]:
+        return tuple(self._instances)
+
+    def track(self, instance : Any) -> None:
+        """Remember instance under every watched implement of its type until it is destroyed"""
+
+        cls = type(instance)
+        tracked = self._tracked.get(cls)
+
+        if tracked is None:
+            instances = self._instances
+            tracked = self._tracked[cls] = tuple(instances[base] for base in self.capabilities(cls) if base in instances)
+
+        for objects in tracked:
+            objects.add(instance)
+
+    def untrack(self, instance : Any) -> None:
+        """Stop tracking instance before it is destroyed"""
+
+        for objects in self._instances.values():
+            objects.discard(instance)
+
+    def instances(self, implement : type) -> list[Any]:
+        """The live objects that implement implement.
+
+        The first call for an implement starts watching it, so only objects created after it are found."""
+
+        objects = self._instances.get(implement)
+
+        if objects is None:
+            self.watch(implement)
+            return []
+
+        return list(objects)
+
+    def count(self, implement : type) -> int:
+        """How many live objects implement implement. Like instances(), the first call starts watching it"""
+
+        objects = self._instances.get(implement)
+
+        if objects is None:
+            self.watch(implement)
+            return 0
+
+        return len(objects)
+
+    def stats(self) -> dict[str, int]:
+        """How many answers are cached and how many objects are tracked"""
+
+        return {
+            "cached": len(self._implements),
+            "types": len(self._capabilities),
+            "watched": len(self._instances),
+            "tracked": sum(len(objects) for objects in self._instances.values()),
+            }
+
+
+default_capability_registry = CapabilityRegistry()
@@ -0,0 +1,183 @@
+"""Finding which sprites touch each other"""
+
+from typing import Any, Hashable, Iterator, Union
+
+from pygame.mask import Mask
+
+from .Core import Thing, Signal
+from .Spatial import SpatialGrid
+
+
+class CollisionWorld(Thing):
+    """Finds the colliding pairs among many sprites in close to linear time.
+
+    The broadphase is a SpatialGrid of the sprites' rects. Every update re-reads the rects, and only sprites
+    that left their cells touch the grid. Candidate pairs whose rects overlap are then tested with their masks,
+    when both have one. on_enter, on_stay and on_exit are emitted with the two sprites of every pair,
+    the one added first coming first."""
+
+    on_enter = Signal(None)
+    on_stay = Signal(None)
+    on_exit = Signal(None)
+
+    def __init__(self, cell_size : int = 128):
+        """Initialize an empty collision world whose grid has square cells of the given size"""
+
+        super().__init__()
+
+        self._grid : SpatialGrid = SpatialGrid(cell_size)
+        self._colliders : dict[Hashable, int] = dict()
+        self._masks : dict[Hashable, Union[Mask, None]] = dict()
+        self._serial : int = 0
+        self._contacts : set[tuple[Hashable, Hashable]] = set()
+
+        self._candidates : int = 0
+        self._mask_tests : int = 0
+
+    @property
+    def grid(self) -> SpatialGrid:
+        """The broadphase grid"""
+
+        return self._grid
+
+    def add(self, sprite : Any, mask : Union[Mask, None] = None) -> None:
+        """Collide sprite from the next update on.
+
+        Without a mask the sprite's own _mask is used if it has one, otherwise its rect is its shape."""
+
+        if sprite in self._colliders:
+            return
+
+        self._colliders[sprite] = self._serial
+        self._serial += 1
+        self._masks[sprite] = mask
+
+        rect = sprite.rect
+
+        if rect is not None:
+            self._grid.insert(sprite, rect)
+
+    def set_mask(self, sprite : Any, mask : Union[Mask, None]) -> None:
+        """Use mask as the shape of sprite. None goes back to the sprite's own _mask"""
+
+        self._masks[sprite] = mask
+
+    def remove(self, sprite : Any) -> bool:
+        """Stop colliding sprite. Every contact it had is ended with on_exit"""
+
+        if sprite not in self._colliders:
+            return False
+
+        ended = sorted((pair for pair in self._contacts if sprite in pair), key=self._pair_order)
+        self._contacts.difference_update(ended)
+
+        for a, b in ended:
+            self.on_exit.emit(a, b)
+
+        self._grid.remove(sprite)
+        del self._colliders[sprite]
+        del self._masks[sprite]
+
+        return True
+
+    def _pair_order(self, pair : tuple[Hashable, Hashable]) -> tuple[int, int]:
+        colliders = self._colliders
+        return (colliders[pair[0]], colliders[pair[1]])
+
+    def _shape(self, sprite : Any) -> Union[Mask, None]:
+        mask = self._masks[sprite]
+        return getattr(sprite, "_mask", None) if mask is None else mask
+
+    def update(self) -> None:
+        """Move every sprite in the grid, find the colliding pairs and emit the signals"""
+
+        grid = self._grid
+        colliders = self._colliders
+
+        for sprite in colliders:
+            rect = sprite.rect
+
+            if rect is None:
+                grid.remove(sprite)
+            else:
+                grid.insert(sprite, rect)
+
+        shape = self._shape
+        rect_of = grid.rect
+        contacts = set()
+        candidates = 0
+        mask_tests = 0
+
+        for a, b in grid.pairs():
+            candidates += 1
+
+            if colliders[a] > colliders[b]:
+                a, b = b, a
+
+            # the narrowphase: do the masks of two sprites whose rects overlap share a pixel?
+            a_mask = shape(a)
+            b_mask = shape(b)
+
+            if a_mask is not None and b_mask is not None:
+                mask_tests += 1
+                a_x, a_y, _, _ = rect_of(a)
+                b_x, b_y, _, _ = rect_of(b)
+
+                if a_mask.overlap(b_mask, (b_x - a_x, b_y - a_y)) is None:
+                    continue
+
+            contacts.add((a, b))
+
+        self._candidates = candidates
+        self._mask_tests = mask_tests
+
+        previous = self._contacts
+        self._contacts = contacts
+
+        for a, b in sorted(previous - contacts, key=self._pair_order):
+            self.on_exit.emit(a, b)
+
+        for a, b in sorted(contacts - previous, key=self._pair_order):
+            self.on_enter.emit(a, b)
+
+        for a, b in sorted(contacts & previous, key=self._pair_order):
+            self.on_stay.emit(a, b)
+
+    def contacts(self, sprite : Any = None) -> list[tuple[Any, Any]]:
+        """The colliding pairs found by the last update, only those of sprite if it is given"""
+
+        pairs = self._contacts if sprite is None else [pair for pair in self._contacts if sprite in pair]
+
+        return sorted(pairs, key=self._pair_order)
+
+    def colliding(self, a : Any, b : Any) -> bool:
+        """Did the last update find a and b colliding?"""
+
+        return (a, b) in self._contacts or (b, a) in self._contacts
+
+    def stats(self) -> dict[str, int]:
+        """How many colliders there are, and how many candidate pairs, mask tests and contacts the last update had"""
+
+        return {
+            "colliders": len(self._colliders),
+            "candidates": self._candidates,
+            "mask_tests": self._mask_tests,
+            "contacts": len(self._contacts),
+            }
+
+    def clear(self) -> None:
+        """Remove every sprite without emitting on_exit"""
+
+        self._grid.clear()
+        self._colliders.clear()
+        self._masks.clear()
+        self._contacts.clear()
+
+    def __contains__(self, sprite : Any) -> bool:
+        return sprite in self._colliders
+
+    def __len__(self) -> int:
+        return len(self._colliders)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._colliders)
@@ -37,6 +37,15 @@ GRAVE_PROGRAMDATA   = path.abspath(
     path.join(GRAVE_HOME, 'AppData', 'Local')
     )
 
+# PyGame subsystems a game can choose to initialize. The display is always initialized.
+
+GRAVE_SUBSYSTEMS    = (
+    "display",
+    "font",
+    "mixer",
+    "joystick",
+    )
+
 # Numbers
 
 GRAVE_MAGIC_NUMBER  = int(0x045C_045C)    # Use me for magic stuff.
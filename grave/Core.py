@@ -1,21 +1,38 @@
 """Implementations of Base classes that don't do all that much"""
 
+from collections import deque
+from itertools import count
 from typing import Any, Callable, Union
 from uuid import uuid4, UUID
+from weakref import ref, WeakMethod, WeakKeyDictionary
+
+
+# Thing ids start out as serial numbers and become UUIDs when first asked for.
+# The random high bits keep the UUIDs of different runs apart.
+
+_GRAVE_thing_serials = count(1)
+_GRAVE_thing_salt = uuid4().int & ~((1 << 64) - 1)
 
 
 class Thing:
     """Every thing has a thing_id. The thing_id identifies it in the object hierarchy."""
 
+    __slots__ = ("_thing_id", "__weakref__")
+
     def __init__(self):
-        """Initialize a thing with a UUID. You can assign a custom UUID if you wish."""
+        """Initialize a thing with a serial number that becomes its UUID on demand. You can assign a custom UUID if you wish."""
 
-        self._thing_id : UUID = uuid4()
+        self._thing_id : Union[int, UUID] = next(_GRAVE_thing_serials)
 
     def thing_id(self) -> UUID:
         """Get the UUID of the thing."""
 
-        return self._thing_id
+        thing_id = self._thing_id
+
+        if type(thing_id) is int:
+            thing_id = self._thing_id = UUID(int=_GRAVE_thing_salt | thing_id)
+
+        return thing_id
 
 
 class FunctionClass(Thing):
@@ -34,7 +51,7 @@ class Infix(FunctionClass):
         self._func = func
 
     def __rlshift__(self, other):
-        return Infix(lambda x, self=self, other=other: self._func(other, x))
+        return _BoundInfix(self._func, other)
 
     def __rshift__(self, other):
         return self._func(other)
@@ -43,46 +60,243 @@ class Infix(FunctionClass):
         return self._func(lhs, rhs)
 
 
+class _BoundInfix:
+    """The left hand side of an infix operator, waiting for the right hand side"""
+
+    __slots__ = ("_func", "_lhs")
+
+    def __init__(self, func : Callable[[Any, Any], Any], lhs : Any):
+        self._func = func
+        self._lhs = lhs
+
+    def __rshift__(self, other):
+        return self._func(self._lhs, other)
+
+    def __call__(self, rhs : Any):
+        return self._func(self._lhs, rhs)
+
+
+class SignalQueue(Thing):
+    """Holds the emissions of queued signals until they are drained, usually once per frame.
+
+    Emitting from any thread only appends to a deque, which needs no lock."""
+
+    def __init__(self):
+        """Initialize an empty signal queue"""
+
+        super().__init__()
+
+        self._records : deque[tuple["Signal", tuple, dict]] = deque()
+
+    def push(self, signal : "Signal", args : tuple, kwargs : dict) -> None:
+        """Queue an emission of signal"""
+
+        self._records.append((signal, args, kwargs))
+
+    def drain(self) -> int:
+        """Deliver every emission queued so far and return how many were delivered.
+
+        Repeated emissions of a coalescing signal with equal arguments are delivered once.
+        Emissions queued while draining wait for the next drain."""
+
+        records = self._records
+        pending = []
+        seen = set()
+
+        for _ in range(len(records)):
+            record = records.popleft()
+            signal, args, kwargs = record
+
+            if signal._coalesce:
+                try:
+                    key = (signal, args, tuple(sorted(kwargs.items())))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                except TypeError:
+                    pass
+
+            pending.append(record)
+
+        for signal, args, kwargs in pending:
+            signal.deliver(*args, **kwargs)
+
+        return len(pending)
+
+    def clear(self) -> None:
+        """Drop every queued emission"""
+
+        self._records.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+default_signal_queue = SignalQueue()
+
 
 class Signal(FunctionClass):
-    """Under the hood, the signal class manages slots"""
+    """Under the hood, the signal class manages slots.
+
+    A signal declared in a class body is a descriptor: every object gets its own lazily created signal with its own slots."""
 
-    def __init__(self, *types, before=None, after=None):
-        """Initialize the signal object"""
+    def __init__(self, *types, before=None, after=None, queued : bool = False, queue : SignalQueue = None, coalesce : bool = False):
+        """Initialize the signal object.
+
+        A queued signal defers its slots until its queue (by default default_signal_queue) is drained."""
 
         super().__init__()
 
+        self._types = types
         self._before_method = before
         self._after_method = after
 
-        self._slots = set()
+        # hooks from the @signal decorator are methods, and are bound to the object the signal belongs to
+        self._bind_hooks : bool = False
+
+        self._queue : Union[SignalQueue, None] = None
+        self._coalesce : bool = False
+        self.set_queued(queued, queue, coalesce)
+
+        self._name : Union[str, None] = None
+        self._bound_signals = None
+
+        self._slots : list[Callable[..., None]] = []
+        self._weak_slots : list[ref] = []
+        self._dispatch : tuple[Callable[..., None], ...] = ()
+        self._weak_dispatch : tuple[ref, ...] = ()
+
+    def __set_name__(self, owner : type, name : str) -> None:
+        """Remember the attribute name the signal is stored under"""
+
+        self._name = name
+
+    def __get__(self, instance : Any, owner : type = None) -> "Signal":
+        """Get the signal belonging to instance, creating it on first access"""
+
+        if instance is None:
+            return self
+
+        # objects without a __dict__ keep their signals here, so look the signal up before building one
+        bound_signals = self._bound_signals
+
+        if bound_signals is not None:
+            bound = bound_signals.get(instance)
+
+            if bound is not None:
+                return bound
+
+        before, after = self._before_method, self._after_method
+
+        if self._bind_hooks:
+            before = None if before is None else before.__get__(instance, owner)
+            after = None if after is None else after.__get__(instance, owner)
+
+        bound = Signal(
+            *self._types,
+            before=before,
+            after=after,
+            queued=self._queue is not None,
+            queue=self._queue,
+            coalesce=self._coalesce,
+            )
+
+        if self._name is not None and hasattr(instance, "__dict__"):
+            bound._name = self._name
+            instance.__dict__[self._name] = bound
+            return bound
+
+        if bound_signals is None:
+            bound_signals = self._bound_signals = WeakKeyDictionary()
+
+        bound_signals[instance] = bound
+
+        return bound
+
+    def set_queued(self, queued : bool = True, queue : SignalQueue = None, coalesce : bool = False) -> None:
+        """Switch between calling slots on emit and queueing the emission for a later drain"""
+
+        self._queue = (default_signal_queue if queue is None else queue) if queued else None
+        self._coalesce = coalesce
+
+    @property
+    def queued(self) -> bool:
+        """Are emissions deferred to a queue?"""
+
+        return self._queue is not None
+
+    def _compile(self) -> None:
+        """Rebuild the tuples that emission walks"""
+
+        self._dispatch = tuple(self._slots)
+        self._weak_dispatch = tuple(self._weak_slots)
+
+    def _drop_dead_slot(self, dead : ref) -> None:
+        """Forget a weak slot whose object has been collected"""
+
+        if dead in self._weak_slots:
+            self._weak_slots.remove(dead)
+            self._compile()
+
+    def add_slot(self, slot : Callable[..., None], weak : bool = False) -> None:
+        """Add slots to the signal object. Weak slots do not keep their object alive."""
+
+        if slot in self.slots():
+            return
+
+        if not weak:
+            self._slots.append(slot)
+        elif hasattr(slot, "__self__") and hasattr(slot, "__func__"):
+            self._weak_slots.append(WeakMethod(slot, self._drop_dead_slot))
+        else:
+            self._weak_slots.append(ref(slot, self._drop_dead_slot))
 
-    def add_slot(self, slot : Callable[..., None]) -> None:
-        """Add slots to the signal object"""
-        self._slots.add(slot)
+        self._compile()
 
     def remove_slot(self, slot : Callable[..., None]) -> None:
         """Remove slots from the signal object"""
-        self._slots.discard(slot)
 
-    def emit(self, *args, **kwargs) -> None:
-        return self.__call__(*args, **kwargs)
+        if slot in self._slots:
+            self._slots.remove(slot)
+        else:
+            self._weak_slots = [weak_slot for weak_slot in self._weak_slots if weak_slot() != slot]
+
+        self._compile()
+
+    def slots(self) -> list[Callable[..., None]]:
+        """Get every live slot connected to the signal"""
+
+        return self._slots + [slot for slot in (weak_slot() for weak_slot in self._weak_slots) if slot is not None]
 
     def __call__(self, *args, **kwargs) -> None:
-        """Call every slot managed by the signal"""
+        """Call every slot managed by the signal, or queue the call if the signal is queued"""
+
+        if self._queue is not None:
+            self._queue.push(self, args, kwargs)
+        else:
+            self.deliver(*args, **kwargs)
+
+    emit = __call__
+
+    def deliver(self, *args, **kwargs) -> None:
+        """Call every slot managed by the signal right away"""
+
         if self._before_method is not None:
             self._before_method(*args, **kwargs)
 
-        for slot in self._slots:
+        for slot in self._dispatch:
             slot(*args, **kwargs)
 
+        for weak_slot in self._weak_dispatch:
+            slot = weak_slot()
+            if slot is not None:
+                slot(*args, **kwargs)
+
         if self._after_method is not None:
             self._after_method(*args, **kwargs)
 
-
-
     @staticmethod
-    def connect(signal : Callable[..., None], slot : Callable[..., None]):
+    def connect(signal : Callable[..., None], slot : Callable[..., None], weak : bool = False):
         """Connect a slot to a signal Qt style"""
 
         if not callable(signal):
@@ -91,7 +305,7 @@ class Signal(FunctionClass):
         if not isinstance(signal, Signal):
             raise ValueError(f"Passed method {signal} is not bound to an object, and cannot be connected to a slot.")
 
-        signal.add_slot(slot)
+        signal.add_slot(slot, weak)
 
 
     @staticmethod
@@ -110,13 +324,18 @@ class Signal(FunctionClass):
 def signal(f):
     """Decorator for signals. Automatically calls the signal that shares the name as the class method"""
 
-    return Signal(before=f)
+    decorated = Signal(before=f)
+    decorated._bind_hooks = True
+
+    return decorated
 
 
 
 class Tag(Thing):
     """A tag can assist in the creation of an ECS system."""
 
+    __slots__ = ("_name", "_description", "_data", "_is_active")
+
     def __init__(self, name: str, description: str = "", data: Any = None):
         """Initialize a tag object"""
 
@@ -178,6 +397,8 @@ class Tag(Thing):
 class GameObject(Thing):
     """Defines a kind of game object that supports a tagging system"""
 
+    __slots__ = ("_name", "_active", "_tags", "_world")
+
     def __init__(
         self,
         name: str = None,
@@ -188,13 +409,17 @@ class GameObject(Thing):
 
         super().__init__()
 
-        self._name : str = name if name is not None else str(uuid4())
+        self._name : Union[str, None] = name
         self._active : bool = active
         self._tags : dict[str, Tag] = dict() if tags is None else tags
+        self._world = None
 
 
     def name(self) -> str:
-        """The name of the object"""
+        """The name of the object. Unnamed objects are named after their thing_id."""
+
+        if self._name is None:
+            self._name = str(self.thing_id())
 
         return self._name
 
@@ -235,63 +460,23 @@ class GameObject(Thing):
         else:
             raise ValueError("Incorrect arguments passed to add_tag")
 
+        if self._world is not None:
+            self._world.retag(self)
 
-class GameObject(Thing):
-    """Defines a kind of game object that supports a tagging system"""
-
-    def __init__(
-        self,
-        name: str = None,
-        active : bool = True,
-        tags : dict[str, Tag] = None
-        ):
-        """Initialize a game object"""
+    def remove_tag(self, name : str) -> bool:
+        """Remove the tag with the given name"""
 
-        super().__init__()
-
-        self._name : str = name if name is not None else str(uuid4())
-        self._active : bool = active
-        self._tags : dict[str, Tag] = dict() if tags is None else tags
+        if name not in self._tags:
+            return False
 
+        del self._tags[name]
 
-    def name(self) -> str:
-        """The name of the object"""
+        if self._world is not None:
+            self._world.retag(self)
 
-        return self._name
+        return True
 
-    def active(self) -> str:
-        """Will the object be active in the scene"""
+    def world(self):
+        """The world the object is registered in, if any"""
 
-        return self._active
-
-
-    def set_active(self, is_active: bool) -> None:
-        """Active setter"""
-
-        self._active = is_active
-
-    def tags(self) -> dict[str, Tag]:
-        """get the dictionary of tags"""
-
-        return self._tags
-
-    def tag(self, name : str) -> Tag:
-        """Get the tag at the given name in the dictionary"""
-
-        return self._tags[name]
-
-    def add_tag(self, **kwargs) -> None:
-        """Add a tag. Either use tag, or name, description, and data as args"""
-
-        keys = kwargs.keys()
-
-        if "tag" in keys and len(keys) == 1:
-            self._tags[kwargs["tag"].name] = kwargs["tag"]
-        elif "name" in keys and 1 <= len(keys) <= 3:
-            name = kwargs["name"]
-            desc = None if "description" not in keys else kwargs["description"]
-            data = None if "data" not in keys else kwargs["data"]
-
-            self._tags[kwargs["name"]] = Tag(name, desc, data)
-        else:
-            raise ValueError("Incorrect arguments passed to add_tag")
+        return self._world
@@ -1,5 +1,6 @@
 import sys
 import os
+import copy
 import importlib
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
@@ -7,12 +8,17 @@ import pygame
 import re
 import warnings
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
 from time import time
-from typing import Callable, Any, Union
+from typing import Callable, Any, Iterable, Union
 from uuid import uuid4
 
-from .Constants import GRAVE_DIR
-from .Core import GameObject, Signal
+from .Assets import AssetManager
+from .Constants import GRAVE_DIR, GRAVE_SUBSYSTEMS
+from .Core import GameObject, Signal, default_signal_queue
+from .Profiler import FrameProfiler
+from .Render import DirtyRects
 
 
 class Scene(GameObject):
@@ -33,20 +39,91 @@ class Scene(GameObject):
         self._is_valid = True
         self._quit = False
         self._timestart = time()
+        self._dirty_rects = DirtyRects(screen.get_rect())
+        self._initial_state = None
+        self._alpha : float = 1.0
 
 
     quit_game = Signal(None)
 
+    # Attributes the default snapshot() copies. Scenes that list some are pooled and reset instead of rebuilt.
+    snapshot_attributes : tuple[str, ...] = ()
+
+    # Names of the scenes that usually follow this one. They are built in the background while this scene runs.
+    next_scenes : tuple[str, ...] = ()
+
+    def preload_scenes(self) -> tuple[str, ...]:
+        """The scenes to build in the background while this scene runs. Override for a dynamic list."""
+
+        return self.next_scenes
+
+    def snapshot(self) -> Any:
+        """Capture what restore() needs to put the scene back into its current state.
+
+        Returning None means the scene cannot be reset and is rebuilt instead."""
+
+        if not self.snapshot_attributes:
+            return None
+
+        return {name: copy.deepcopy(getattr(self, name)) for name in self.snapshot_attributes}
+
+    def restore(self, state : Any) -> None:
+        """Put the scene back into a state captured by snapshot()"""
+
+        for name, value in state.items():
+            setattr(self, name, copy.deepcopy(value))
+
+    def capture_initial_state(self) -> None:
+        """Remember the state reset() returns to. The game calls this right after building the scene."""
+
+        self._initial_state = self.snapshot()
+
+    def reset(self) -> bool:
+        """Put the scene back into its initial state, if it supports snapshots"""
+
+        if self._initial_state is None:
+            return False
+
+        self._is_valid = True
+        self._quit = False
+        self.restore(self._initial_state)
+        self.clock()
+        self.mark_dirty()
+
+        return True
+
     def clock(self) -> None:
         """Reset the scene clock."""
 
         self._timestart = time()
 
     def draw(self) -> None:
-        """draw the scene."""
+        """draw the scene. With a fixed simulation rate, interpolate between simulation steps by alpha."""
 
         pass
 
+    @property
+    def alpha(self) -> float:
+        """How far the frame being drawn lies between the last simulation step and the next one.
+
+        The game sets it before every draw when it runs with a fixed simulation rate. Otherwise it stays 1.0."""
+
+        return self._alpha
+
+    @property
+    def dirty_rects(self) -> DirtyRects:
+        """The tracker of regions of the screen that changed this frame"""
+
+        return self._dirty_rects
+
+    def mark_dirty(self, rect = None) -> None:
+        """Report a changed region of the screen. Passing no rect requests a full redraw."""
+
+        if rect is None:
+            self._dirty_rects.invalidate()
+        else:
+            self._dirty_rects.mark(rect)
+
     def process_event(self, event) -> None:
         """Process PyGame events in the scene."""
 
@@ -101,11 +178,13 @@ class VideoGame(GameObject):
         window_title: str = "PyGrave Game",
         icon_path: str = os.path.join(GRAVE_DIR, "res", "icon.png"),
         global_things : dict[str, Any]= None,
+        subsystems : Union[Iterable[str], None] = None,
         ):
-        """Initialize a new game"""
+        """Initialize a new game.
+
+        subsystems names the pygame subsystems to initialize, out of GRAVE_SUBSYSTEMS. None initializes all of them."""
 
-        pygame.init()
-        pygame.joystick.init()
+        self._subsystems : tuple[str, ...] = self.init_subsystems(subsystems)
 
         self._window_size: tuple[int, int] = (width, height)
         self._clock: pygame.time.Clock = pygame.time.Clock()
@@ -117,9 +196,9 @@ class VideoGame(GameObject):
 
         self._game_over: bool = False
 
-        if not pygame.font:
+        if "font" in self._subsystems and not pygame.font:
             warnings.warn("Fonts is disabled.", RuntimeWarning)
-        if not pygame.mixer:
+        if "mixer" in self._subsystems and not pygame.mixer:
             warnings.warn("Sound is disabled.", RuntimeWarning)
 
         self._global_things : dict[str, Thing] = {"root": self, "clock": self._clock}
@@ -128,6 +207,13 @@ class VideoGame(GameObject):
             for k, v in global_things.items():
                 self._global_things[k] = v
 
+        assets = self._global_things.get("assets")
+
+        if assets is None:
+            assets = self._global_things["assets"] = AssetManager()
+
+        self._assets : AssetManager = assets
+
         pygame.display.set_icon(
             pygame.transform.scale(
                 pygame.image.load(icon_path),
@@ -135,6 +221,38 @@ class VideoGame(GameObject):
                 )
             )
 
+    @staticmethod
+    def init_subsystems(subsystems : Union[Iterable[str], None] = None) -> tuple[str, ...]:
+        """Initialize the display and the named pygame subsystems, and return the names of those initialized"""
+
+        if subsystems is None:
+            pygame.init()
+            return GRAVE_SUBSYSTEMS
+
+        subsystems = tuple(dict.fromkeys(("display", *subsystems)))
+        unknown = [name for name in subsystems if name not in GRAVE_SUBSYSTEMS]
+
+        if unknown:
+            raise ValueError(f"Unknown pygame subsystems: {', '.join(unknown)}")
+
+        for name in subsystems:
+            module = getattr(pygame, name, None)
+
+            if module is None:
+                continue
+
+            try:
+                module.init()
+            except pygame.error as error:
+                if name == "display":
+                    raise
+                warnings.warn(f"Could not initialize {name}: {error}", RuntimeWarning)
+
+        return subsystems
+
+    def subsystems(self) -> tuple[str, ...]:
+        return self._subsystems
+
     def window_title(self):
         return self._title
 
@@ -144,6 +262,9 @@ class VideoGame(GameObject):
     def screen(self):
         return self._screen
 
+    def assets(self) -> AssetManager:
+        return self._assets
+
     def __call__(self) -> int:
         """alias of run() to allow calling of videogames"""
         return self.run()
@@ -168,11 +289,31 @@ class SceneDictVideogame(VideoGame):
         scene_dir_list : list[str] = [],
         game_module_override : str = "grave",
         first_level_override : Union[str, None] = None,
-        custom_level_sorting_key : str = str.casefold
+        custom_level_sorting_key : str = str.casefold,
+        dirty_rects : bool = False,
+        dirty_rect_threshold : float = 0.5,
+        simulation_rate : Union[int, None] = None,
+        max_catchup_steps : int = 5,
+        profile : bool = False,
+        lazy_scenes : bool = True,
+        subsystems : Union[Iterable[str], None] = None,
+        dirty_rect_max_regions : int = 16,
         ):
         """initialize a SceneDictVideogame"""
 
-        super().__init__(width, height, surface_flags, window_title, icon_path, global_things)
+        super().__init__(width, height, surface_flags, window_title, icon_path, global_things, subsystems)
+
+        self._dirty_rect_mode : bool = dirty_rects
+        self._dirty_rect_threshold : float = dirty_rect_threshold
+        self._dirty_rect_max_regions : int = dirty_rect_max_regions
+        self._timestep : Union[float, None] = None if simulation_rate is None else 1 / simulation_rate
+        self._max_catchup_steps : int = max_catchup_steps
+        self._signal_queue = self._global_things.setdefault("signal_queue", default_signal_queue)
+        self._assets.signal_queue = self._signal_queue
+        self._profiler : Union[FrameProfiler, None] = None
+
+        if profile:
+            self._profiler = self._global_things.setdefault("profiler", FrameProfiler())
 
         levels : list[str] = []
 
@@ -181,7 +322,7 @@ class SceneDictVideogame(VideoGame):
 
         levels = sorted(levels, key=custom_level_sorting_key)
 
-        level_modules = dict()
+        self._level_paths : dict[str, tuple[str, str]] = dict()
         self._level_classes : dict[str, Scene] = dict()
 
         to_classname : Callable[str, str] = lambda s : f"{s[0].upper()}{s[1:]}"
@@ -191,73 +332,235 @@ class SceneDictVideogame(VideoGame):
 
             module_loc : str = f"{game_module_override}.{module_name}"
 
-            spec = importlib.util.spec_from_file_location(module_loc, level)
-
-            level_modules[module_loc] = importlib.util.module_from_spec(spec)
-
-
-            sys.modules[module_loc] = level_modules[module_loc]
-
-            spec.loader.exec_module(level_modules[module_loc])
-
             class_name : str = ''.join([to_classname(fname) for fname in module_name.split('_')])
 
-            self._level_classes[class_name] = getattr(sys.modules[module_loc], class_name)
-            if not issubclass(self._level_classes[class_name], Scene):
-                raise ValueError(f"{class_name} is not a Pygrave Scene")
+            self._level_paths[class_name] = (module_loc, level)
 
-        if first_level_override is not None and first_level_override in self._level_classes:
+        if first_level_override is not None and first_level_override in self._level_paths:
             self._first_level = first_level_override
         else:
-            self._first_level = None if len(self._level_classes.keys()) == 0 else sorted(self._level_classes.keys(), key=custom_level_sorting_key)[0]
+            self._first_level = None if len(self._level_paths.keys()) == 0 else sorted(self._level_paths.keys(), key=custom_level_sorting_key)[0]
 
+        self._scene_dict : dict[str, Scene] = dict()
+        self._pending_scenes : dict[str, Future] = dict()
+        self._scene_lock : Lock = Lock()
+        self._class_lock : Lock = Lock()
+        self._preloader : Union[ThreadPoolExecutor, None] = None
 
-        self._scene_dict = dict()
-        self.build_scene_dict()
+        if not lazy_scenes:
+            self.build_scene_dict()
 
     def quit_game(self) -> None:
         self._game_over = True
 
     def reinitialize_level(self, level_name : str) -> None:
-        """reinitialize the level with the given name"""
+        """reinitialize the level with the given name.
+
+        A scene that supports snapshots is reset and kept. Otherwise the new instance is built on next use, or when a scene preloads it."""
+
+        with self._scene_lock:
+            scene = self._scene_dict.get(level_name)
+
+            if scene is None or scene.reset():
+                return
+
+            del self._scene_dict[level_name]
+
+    def level_class(self, level_name : str) -> type:
+        """import the module of the level with the given name, the first time it is asked for"""
+
+        with self._class_lock:
+            if level_name in self._level_classes:
+                return self._level_classes[level_name]
+
+            module_loc, level = self._level_paths[level_name]
+
+            spec = importlib.util.spec_from_file_location(module_loc, level)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_loc] = module
+            spec.loader.exec_module(module)
+
+            LevelClass = getattr(module, level_name)
+            if not issubclass(LevelClass, Scene):
+                raise ValueError(f"{level_name} is not a Pygrave Scene")
+
+            self._level_classes[level_name] = LevelClass
 
-        LevelClass = self._level_classes[level_name]
-        del self._scene_dict[level_name]
-        self._scene_dict[level_name] = LevelClass(self._screen, self._global_things)
+            return LevelClass
+
+    def build_scene(self, level_name : str) -> Scene:
+        """construct the level with the given name and connect it to the game"""
+
+        scene = self.level_class(level_name)(self._screen, self._global_things)
+        Signal.connect(scene.quit_game, self.quit_game)
+        scene.capture_initial_state()
+
+        return scene
+
+    def scene(self, level_name : str) -> Scene:
+        """get the level with the given name, building it or waiting for its preload if needed"""
+
+        with self._scene_lock:
+            scene = self._scene_dict.get(level_name)
+            pending = self._pending_scenes.get(level_name)
+
+        if scene is not None:
+            return scene
+
+        if pending is not None:
+            return pending.result()
+
+        scene = self.build_scene(level_name)
+
+        with self._scene_lock:
+            return self._scene_dict.setdefault(level_name, scene)
+
+    def _preload_scene(self, level_name : str) -> Scene:
+        try:
+            scene = self.build_scene(level_name)
+
+            with self._scene_lock:
+                return self._scene_dict.setdefault(level_name, scene)
+        finally:
+            with self._scene_lock:
+                self._pending_scenes.pop(level_name, None)
+
+    def preload(self, level_names) -> None:
+        """build the named levels on a background thread, unless they are built already"""
+
+        for level_name in level_names:
+            with self._scene_lock:
+                if level_name in self._scene_dict or level_name in self._pending_scenes:
+                    continue
+
+                if self._preloader is None:
+                    self._preloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="grave-preload")
+
+                self._pending_scenes[level_name] = self._preloader.submit(self._preload_scene, level_name)
 
     def build_scene_dict(self) -> None:
-        """build the game's scene dict"""
+        """build every level of the game's scene dict"""
 
-        for level_name, LevelClass in self._level_classes.items():
-            self._scene_dict[level_name] = LevelClass(self._screen, self._global_things)
-            Signal.connect(self._scene_dict[level_name].quit_game, self.quit_game)
+        for level_name in self._level_paths:
+            self.scene(level_name)
+
+    @property
+    def profiler(self) -> Union[FrameProfiler, None]:
+        """The frame profiler, if the game was created with profile=True"""
+
+        return self._profiler
+
+    def present(self, scene : Scene) -> None:
+        """Draw the scene and show it.
+
+        In dirty rect mode the scene is drawn once, clipped to the bounding box of the regions it reported as changed,
+        and only those regions are shown. Too many regions, or a box covering more than the threshold, redraw everything."""
+
+        profiler = self._profiler
+        regions = scene.dirty_rects.flush(self._dirty_rect_threshold) if self._dirty_rect_mode else None
+        bounds = None
+
+        if regions:
+            bounds = regions[0].unionall(regions[1:])
+            screen_width, screen_height = self._screen.get_size()
+
+            if (
+                len(regions) > self._dirty_rect_max_regions
+                or bounds.w * bounds.h > self._dirty_rect_threshold * screen_width * screen_height
+                ):
+                regions = None
+
+        if regions is None:
+            scene.draw()
+            if profiler is not None:
+                profiler.mark("draw")
+            pygame.display.flip()
+            if profiler is not None:
+                profiler.mark("present")
+            return
+
+        if not regions:
+            return
+
+        self._screen.set_clip(bounds)
+        scene.draw()
+        self._screen.set_clip(None)
+        if profiler is not None:
+            profiler.mark("draw")
+        pygame.display.update(regions)
+        if profiler is not None:
+            profiler.mark("present")
 
     def run(self) -> int:
         """run the game loop"""
 
-        scene_dict = self._scene_dict
         current_scene_string = self._first_level
+        profiler = self._profiler
 
         while not self._game_over:
-            current_scene = scene_dict[current_scene_string]
+            current_scene = self.scene(current_scene_string)
             current_scene.clock()
+            current_scene.dirty_rects.enabled = self._dirty_rect_mode
             current_scene.start_scene()
+            self.preload(current_scene.preload_scenes())
+
+            accumulator = 0.0
 
             while current_scene.is_valid:
-                self._clock.tick(current_scene.frame_rate)
-                for event in pygame.event.get():
+                if profiler is not None:
+                    profiler.next_frame()
+                elapsed = self._clock.tick(current_scene.frame_rate)
+                if profiler is not None:
+                    profiler.mark("clock_wait")
+                events = pygame.event.get()
+                if profiler is not None:
+                    profiler.mark("event_pump")
+                for event in events:
                     current_scene.process_event(event)
-                current_scene.update_scene()
-                current_scene.draw()
-                pygame.display.flip()
+                if profiler is not None:
+                    profiler.mark("process_event")
+                self._signal_queue.drain()
+                if profiler is not None:
+                    profiler.mark("signals")
+
+                if self._timestep is None:
+                    current_scene.update_scene()
+                    if profiler is not None:
+                        profiler.mark("update_scene")
+                    self.present(current_scene)
+                    continue
+
+                accumulator += elapsed / 1000
+                steps = 0
+
+                while accumulator >= self._timestep and steps < self._max_catchup_steps and current_scene.is_valid:
+                    current_scene.update_scene()
+                    accumulator -= self._timestep
+                    steps += 1
+
+                if profiler is not None:
+                    profiler.mark("update_scene")
+
+                # Drop whatever could not be caught up on, rather than falling further behind every frame.
+                if accumulator >= self._timestep:
+                    accumulator %= self._timestep
+
+                current_scene._alpha = accumulator / self._timestep
+                self.present(current_scene)
             command = current_scene.end_scene()
 
             match command:
                 case ['QUIT_GAME']:
-                    self._game_is_over = True
+                    self._game_over = True
                 case ['CHANGE_SCENE', scene_name]:
                     self.reinitialize_level(current_scene_string)
                     current_scene_string = scene_name
 
+        if self._preloader is not None:
+            self._preloader.shutdown(wait=True, cancel_futures=True)
+            self._preloader = None
+
+        self._assets.shutdown()
+
         pygame.quit()
         return 0
@@ -1,12 +1,64 @@
-from pygame import Rect, BLEND_RGBA_MULT, MOUSEMOTION, MOUSEBUTTONUP, MOUSEBUTTONDOWN, mouse
+from pygame import Rect, Surface, BLEND_PREMULTIPLIED, BLEND_RGBA_MULT, MOUSEMOTION, MOUSEBUTTONUP, MOUSEBUTTONDOWN, SRCALPHA, font
 from pygame.mask import from_surface
 
 from .Core import GameObject, Signal
 from .Implements import ImplementsSprite, ImplementsPosition
+from .Profiler import PHASES
+from .Render import BlitBatch
+from .Spatial import SpatialGrid
+
+
+POINTER_EVENTS = frozenset((MOUSEMOTION, MOUSEBUTTONDOWN, MOUSEBUTTONUP))
 
 
 class Widget(GameObject, ImplementsPosition, ImplementsSprite):
-    """A drawable that has subwidgets"""
+    """A drawable that has subwidgets.
+
+    Subwidgets are drawn in order of their z, and in the order they were added when their z is equal.
+    The root widget keeps the whole tree flattened into one display list, so draw and update do not recurse.
+    Override draw_self and update_self rather than draw and update.
+
+    A widget's local position is relative to its parent. x, y, position and rect are in screen coordinates.
+    They are computed from the parent's when they are asked for, so moving a widget does not touch its subwidgets.
+
+    A widget whose layer is cached draws itself and its subwidgets into an off-screen surface once,
+    and then draws that surface with one blit until something in the subtree changes.
+    The layer holds premultiplied alpha, so translucent widgets look the same, to within rounding, as when
+    they are drawn one by one. Widgets that blit on their own rather than through _blit are not premultiplied.
+
+    The blits of a draw pass are collected and submitted with Surface.blits. Widgets whose draw_self only
+    blits through _blit set _batched_draw to True, and the batch is flushed before any other widget draws.
+    Overriding draw_self resets _batched_draw to False, unless the subclass sets it too.
+    A widget given a TextureAtlas draws its image from the atlas page it was packed into."""
+
+    _mask = None
+
+    # counts the moves of all widgets, so a widget knows its screen position is current while nothing moved
+    _transform_epoch : int = 0
+
+    # is a root delivering a pointer event to the widgets it routed it to?
+    _routing_pointer : bool = False
+
+    # counts the widgets added to parents, so siblings of equal z keep the order they were added in
+    _add_serial : int = 0
+
+    # the batch the running draw pass collects blits in, and whether draw passes batch at all
+    _blit_batch = None
+    _batching : bool = True
+
+    # the cached layer being rendered. Images blitted onto it are premultiplied first
+    _premultiplied_layer = None
+
+    # does draw_self only blit through _blit and _blit_clipped?
+    _batched_draw : bool = False
+
+    def __init_subclass__(cls, **kwargs):
+        """a subclass that overrides draw_self is not batched unless it sets _batched_draw itself"""
+
+        super().__init_subclass__(**kwargs)
+
+        if "draw_self" in cls.__dict__ and "_batched_draw" not in cls.__dict__:
+            cls._batched_draw = False
 
     def __init__(
         self,
@@ -19,35 +71,762 @@ class Widget(GameObject, ImplementsPosition, ImplementsSprite):
         super().__init__(name, active, tags)
 
         self._parent = parent
-        self._widgets = set()
+        self._widgets = []
+        self._z : int = 0
+        self._serial : int = 0
+        self._display_list = None
+        self._display_span : tuple[int, int] = (0, 1)
         self._surface = surface
+        self._dirty_rects = None
+        self._drawn_rect = None
+
+        self._overlap_mask = None
+        self._clipped_image = None
+        self._clip_area = None
+        self._clip_key = None
+        self._clip_hits : int = 0
+        self._clip_rebuilds : int = 0
+        self._rect_clips : int = 0
+
+        self._rectangular = None
+        self._shape_mask = None
+        self._shape_rectangular : bool = False
+
+        self._world_x = 0
+        self._world_y = 0
+        self._world_stamp : int = 0
+        self._parent_stamp : int = -1
+        self._transform_dirty : bool = True
+        self._resolved_epoch : int = -1
+        self._rect = None
+        self._rect_key = None
+
+        self._layer_cached : bool = False
+        self._layer = None
+        self._layer_offset : tuple[int, int] = (0, 0)
+        self._layer_valid : bool = False
+        self._layer_renders : int = 0
+
+        self._atlas = None
+
+        self._spatial_index = None
+        self._pointer_widgets = set()
+        self._moved_widgets = set()
 
     def _set_parent(self, parent):
         self._parent = parent
+        self._transform_dirty = True
+        Widget._transform_epoch += 1
 
-    def draw(self) -> None:
-        """draw all subwidgets of this widget."""
+    def root(self):
+        """the topmost widget of the tree this widget belongs to"""
+
+        widget = self
+
+        while widget._parent is not None:
+            widget = widget._parent
+
+        return widget
+
+    def walk(self):
+        """iterate over this widget and every widget below it, in draw order"""
+
+        yield from self.display_list()
+
+    def display_list(self) -> tuple:
+        """this widget and every widget below it, in draw order.
+
+        The root builds the list for the whole tree once and reuses it until the tree or a z changes."""
+
+        root = self.root()
+        display_list = root._display_list
+
+        if display_list is None:
+            display_list = root._display_list = root._flatten()
+
+        if root is self:
+            return display_list
+
+        start, end = self._display_span
+
+        if start < len(display_list) and display_list[start] is self:
+            return display_list[start:end]
+
+        # a widget constructed with a parent but never added to it is not part of the parent's tree
+        return self._flatten()
+
+    def _subtree(self):
+        """iterate over this widget and every widget below it without building a display list"""
+
+        stack = [self]
+
+        while stack:
+            widget = stack.pop()
+            yield widget
+            stack.extend(widget._widgets)
+
+    def _flatten(self) -> tuple:
+        order = []
+        stack = [self]
+
+        while stack:
+            widget = stack.pop()
+            widget._display_span = (len(order), 0)
+            order.append(widget)
+            stack.extend(reversed(widget._widgets))
+
+        # every subtree ends where the last widget below it ends
+        for widget in reversed(order):
+            start, _ = widget._display_span
+            widget._display_span = (start, widget._widgets[-1]._display_span[1] if widget._widgets else start + 1)
+
+        return tuple(order)
+
+    def _invalidate_display_list(self) -> None:
+        """make the root flatten the tree again before the next draw"""
+
+        self.root()._display_list = None
+
+    @property
+    def z(self) -> int:
+        """the draw order of the widget among its siblings. Higher z is drawn later, on top"""
+
+        return self._z
+
+    @z.setter
+    def z(self, z : int) -> None:
+        """set the draw order of the widget among its siblings"""
+
+        self.set_z(z)
+
+    def set_z(self, z : int) -> None:
+        if z == self._z:
+            return
+
+        self._z = z
+
+        if self._parent is not None:
+            self._parent._widgets.sort(key=Widget._z_key)
+            self._invalidate_display_list()
+            self._parent.invalidate_layer()
+
+        self.mark_dirty()
+
+    @staticmethod
+    def _z_key(widget) -> tuple[int, int]:
+        return (widget._z, widget._serial)
+
+    def _resolve(self) -> None:
+        """bring the screen position up to date, if the widget or any widget above it moved"""
+
+        epoch = Widget._transform_epoch
+
+        if self._resolved_epoch == epoch:
+            return
+
+        self._resolved_epoch = epoch
+        parent = self._parent
+
+        if parent is None:
+            if self._transform_dirty:
+                self._world_x, self._world_y = self._x, self._y
+                self._world_stamp += 1
+                self._transform_dirty = False
+            return
+
+        if parent._resolved_epoch != epoch:
+            parent._resolve()
+
+        if self._transform_dirty or self._parent_stamp != parent._world_stamp:
+            self._world_x = parent._world_x + self._x
+            self._world_y = parent._world_y + self._y
+            self._world_stamp += 1
+            self._parent_stamp = parent._world_stamp
+            self._transform_dirty = False
+
+    def get_x(self) -> int:
+        self._resolve()
+        return self._world_x
+
+    def get_y(self) -> int:
+        self._resolve()
+        return self._world_y
+
+    def set_x(self, x : int) -> None:
+        self.set_position(x, self.get_y())
+
+    def set_y(self, y : int) -> None:
+        self.set_position(self.get_x(), y)
+
+    def set_position(self, x : int, y : int) -> None:
+        """set X and Y in screen coordinates"""
+
+        parent = self._parent
+
+        if parent is not None:
+            parent._resolve()
+            x -= parent._world_x
+            y -= parent._world_y
+
+        self.set_local_position(x, y)
+
+    def set_local_position(self, x : int, y : int) -> None:
+        """set X and Y relative to the parent"""
+
+        self._x, self._y = x, y
+        self._transform_dirty = True
+        Widget._transform_epoch += 1
+        self._moved()
+
+        # a cached layer of the widget itself moves along with it, only the layers above need rendering again
+        if self._parent is not None:
+            self._parent.invalidate_layer()
+
+    @property
+    def local_position(self) -> tuple[int, int]:
+        """X and Y relative to the parent"""
+
+        return (int(self._x), int(self._y))
+
+    @local_position.setter
+    def local_position(self, xy : tuple[int, int]) -> None:
+        """set X and Y relative to the parent"""
+
+        self.set_local_position(*xy)
+
+    @property
+    def position(self) -> tuple[int, int]:
+        """Get X and Y in screen coordinates as a tuple"""
+
+        self._resolve()
+        return (int(self._world_x), int(self._world_y))
+
+    @position.setter
+    def position(self, xy : tuple[int, int]) -> None:
+        """set X and Y in screen coordinates"""
+
+        self.set_position(*xy)
+
+    @property
+    def x(self) -> int:
+        """get the x position in screen coordinates"""
+
+        return self.get_x()
+
+    @x.setter
+    def x(self, X : int) -> None:
+        """set the x position in screen coordinates"""
+
+        self.set_x(X)
+
+    @property
+    def y(self) -> int:
+        """get the y position in screen coordinates"""
+
+        return self.get_y()
+
+    @y.setter
+    def y(self, Y : int) -> None:
+        """set the y position in screen coordinates"""
+
+        self.set_y(Y)
+
+    @property
+    def rect(self) -> Rect:
+        """the widget's rect in screen coordinates. It is cached and shared, so copy it before changing it"""
+
+        image = self._image
+
+        if image is None:
+            return None
+
+        self._resolve()
+        key = (self._world_stamp, image)
+
+        if key != self._rect_key:
+            self._rect = Rect(self._world_x, self._world_y, *image.get_size())
+            self._rect_key = key
+
+        return self._rect
+
+    def _moved(self) -> None:
+        """note that the rects of the widget and its subwidgets need to be indexed again before the next pointer event"""
+
+        root = self.root()
+
+        if root._spatial_index is not None:
+            root._moved_widgets.add(self)
+
+    def _reindex_moved(self) -> None:
+        index = self._spatial_index
+        moved = self._moved_widgets
+
+        while moved:
+            for widget in moved.pop().walk():
+                widget._index(index)
+
+    def _index(self, index) -> None:
+        rect = self.rect
+
+        if rect is None:
+            index.remove(self)
+        else:
+            index.update(self, rect)
+
+    def build_spatial_index(self, cell_size : int = 128) -> None:
+        """index the rects of every widget in this tree, so pointer events only reach the widgets under the pointer"""
+
+        self._spatial_index = SpatialGrid(cell_size)
+        self._moved_widgets.clear()
+
+        for widget in self.walk():
+            widget._index(self._spatial_index)
+
+    def holds_pointer(self) -> bool:
+        """does the widget need pointer events even when the pointer is not over it?"""
+
+        return False
+
+    def _update_pointer_hold(self) -> None:
+        """register with the root while the widget holds the pointer"""
+
+        if self.holds_pointer():
+            self.root()._pointer_widgets.add(self)
+        else:
+            self.root()._pointer_widgets.discard(self)
+
+    def set_dirty_rects(self, dirty_rects) -> None:
+        """report changed regions of this widget and its subwidgets to a DirtyRects tracker"""
+
+        self._dirty_rects = dirty_rects
 
         for widget in self._widgets:
-            widget.draw()
+            widget.set_dirty_rects(dirty_rects)
 
-    def update(self) -> None:
-        """update all subwidgets of this widget."""
+    def mark_dirty(self) -> None:
+        """report the last drawn and the current region of the widget as changed"""
+
+        if self._dirty_rects is None:
+            return
+
+        self._dirty_rects.mark(self._drawn_rect)
+        self._drawn_rect = self.rect
+        self._dirty_rects.mark(self._drawn_rect)
+
+    @property
+    def clipped_image(self):
+        """the image clipped to the parent's mask, or the image itself when there is nothing to clip to.
+
+        A widget entirely outside its rectangular parent gets an empty surface."""
+
+        area = self._clip_area
+
+        if area is not None:
+            if not area.width or not area.height:
+                return Surface((0, 0), SRCALPHA)
+
+            return self._image.subsurface(area)
+
+        return self._image if self._clipped_image is None else self._clipped_image
+
+    @property
+    def rectangular(self):
+        """True or False when declared, otherwise None and the widget checks whether its mask is fully set"""
+
+        return self._rectangular
+
+    @rectangular.setter
+    def rectangular(self, is_rectangular) -> None:
+        """Setter for rectangular"""
+
+        self.set_rectangular(is_rectangular)
+
+    def set_rectangular(self, is_rectangular) -> None:
+        """declare that the widget's shape is, or is not, its whole rect. None detects it from the mask"""
+
+        self._rectangular = is_rectangular
 
         for widget in self._widgets:
-            widget.update()
+            widget.invalidate_clip()
+
+    def is_rectangular(self) -> bool:
+        """can subwidgets be clipped to this widget's rect instead of its mask?"""
+
+        if self._rectangular is not None:
+            return self._rectangular
+
+        mask = self._mask
+
+        if mask is None:
+            return False
+
+        if mask is not self._shape_mask:
+            width, height = mask.get_size()
+            self._shape_mask = mask
+            self._shape_rectangular = mask.count() == width * height
+
+        return self._shape_rectangular
+
+    def update_clip(self) -> None:
+        """clip the image to the parent's shape, reusing the last result while neither has moved or changed.
+
+        A rectangular parent only needs the part of the image inside its rect, which a blit can cut out by itself.
+        Other parents need the per-pixel overlap of both masks."""
+
+        parent = self._parent
+
+        if parent is None or self._mask is None or parent._mask is None:
+            self._overlap_mask = None
+            self._clipped_image = None
+            self._clip_area = None
+            self._clip_key = None
+            return
+
+        rectangular = parent.is_rectangular()
+
+        # only the position relative to the parent matters, so moving the parent keeps the clip
+        key = (self._x, self._y, self._image, self._mask, parent._image, parent._mask, rectangular)
+
+        if key == self._clip_key:
+            self._clip_hits += 1
+            return
+
+        self._clip_key = key
+        self._clip_rebuilds += 1
+        self.invalidate_layer()
+
+        if rectangular:
+            width, height = self._image.get_size()
+            area = Rect((-int(self._x), -int(self._y)), parent._mask.get_size()).clip((0, 0, width, height))
+
+            self._rect_clips += 1
+            self._overlap_mask = None
+            self._clipped_image = None
+            self._clip_area = None if area.size == (width, height) else area
+            return
+
+        self._clip_area = None
+        self._overlap_mask = self._mask.overlap_mask(parent._mask, (-int(self._x), -int(self._y)))
+        self._clipped_image = self._overlap_mask.to_surface(unsetcolor=(0,0,0,0), setcolor=(255,255,255,255))
+        self._clipped_image.blit(self._image, (0,0), special_flags=BLEND_RGBA_MULT)
+
+    def invalidate_clip(self) -> None:
+        """force the clipped image to be rebuilt, e.g. after drawing onto the image in place"""
+
+        self._clip_key = None
+        self._shape_mask = None
+        self.invalidate_layer()
+
+    def clip_cache_stats(self) -> dict[str, int]:
+        """count the clip cache hits and rebuilds of this widget and all of its subwidgets, and how many rebuilds clipped to a rect"""
+
+        stats = {"hits": self._clip_hits, "rebuilds": self._clip_rebuilds, "rect_clips": self._rect_clips}
+
+        for widget in self._widgets:
+            for key, count in widget.clip_cache_stats().items():
+                stats[key] += count
+
+        return stats
+
+    def set_active(self, is_active : bool) -> None:
+        """Active setter"""
+
+        super().set_active(is_active)
+        self.invalidate_layer()
+        self.mark_dirty()
+
+    @property
+    def layer_cached(self) -> bool:
+        """is the widget drawn, with its subwidgets, from a cached off-screen layer?"""
+
+        return self._layer_cached
+
+    @layer_cached.setter
+    def layer_cached(self, is_cached : bool) -> None:
+        """Setter for layer_cached"""
+
+        self.set_layer_cached(is_cached)
+
+    def set_layer_cached(self, is_cached : bool) -> None:
+        """draw the widget and its subwidgets from a cached layer. Suits panels that rarely change"""
+
+        self._layer_cached = is_cached
+        self._layer = None
+        self._layer_valid = False
+
+    def invalidate_layer(self) -> None:
+        """make the cached layers of this widget and of every widget above it render again on the next draw"""
+
+        widget = self
+
+        while widget is not None:
+            if widget._layer_cached:
+                widget._layer_valid = False
+
+            widget = widget._parent
+
+    def layer_renders(self) -> int:
+        """how many times the cached layer was rendered"""
+
+        return self._layer_renders
+
+    def _render_layer(self) -> None:
+        widgets = self.display_list()
+        rects = [rect for rect in (widget.rect for widget in widgets) if rect is not None]
+
+        self._layer_valid = True
+        self._layer_renders += 1
+
+        if not rects:
+            self._layer = None
+            return
+
+        bounds = rects[0].unionall(rects[1:])
+        self._layer = Surface(bounds.size, SRCALPHA)
+
+        outer_layer = Widget._premultiplied_layer
+        Widget._premultiplied_layer = self._layer
+
+        try:
+            Widget._draw_widgets(widgets, self._layer, bounds.topleft, own_layer=True)
+        finally:
+            Widget._premultiplied_layer = outer_layer
+
+        x, y = self.position
+        self._layer_offset = (bounds.x - x, bounds.y - y)
+
+    def _draw_layer(self, surface = None, offset : tuple[int, int] = (0, 0)) -> None:
+        if not self._layer_valid:
+            self._render_layer()
+
+        if self._layer is None:
+            return
+
+        x, y = self.position
+        l_x, l_y = self._layer_offset
+
+        self._blit_onto(surface, self._layer, (x + l_x - offset[0], y + l_y - offset[1]), premultiplied=True)
+
+    @staticmethod
+    def _draw_widgets(widgets, surface = None, offset : tuple[int, int] = (0, 0), own_layer : bool = False) -> None:
+        """draw a run of a display list, drawing cached subtrees from their layers"""
+
+        if not widgets:
+            return
+
+        base = widgets[0]._display_span[0]
+        count = len(widgets)
+        index = 0
+
+        batch = BlitBatch() if Widget._batching else None
+        outer_batch = Widget._blit_batch
+        Widget._blit_batch = batch
+
+        try:
+            while index < count:
+                widget = widgets[index]
+
+                if widget._layer_cached and not (own_layer and index == 0):
+                    widget._draw_layer(surface, offset)
+                    index = widget._display_span[1] - base
+                else:
+                    if batch is not None and not widget._batched_draw:
+                        batch.flush()
+
+                    widget.draw_self(surface, offset)
+                    index += 1
+
+            if batch is not None:
+                batch.flush()
+        finally:
+            Widget._blit_batch = outer_batch
+
+    @staticmethod
+    def set_batching(is_batching : bool) -> None:
+        """collect the blits of draw passes and submit them with Surface.blits, or blit them one by one"""
+
+        Widget._batching = is_batching
+
+    def _blit_onto(self, surface, image, position : tuple[int, int], area = None, premultiplied : bool = False) -> None:
+        """blit onto surface, or onto the widget's surface, through the running draw pass's batch if there is one.
+
+        premultiplied images, and straight alpha images blitted onto a layer being rendered, are blended as premultiplied"""
+
+        target = self._surface if surface is None else surface
+        flags = 0
+
+        if premultiplied:
+            flags = BLEND_PREMULTIPLIED
+        elif target is Widget._premultiplied_layer and image.get_flags() & SRCALPHA:
+            image = image.premul_alpha()
+            flags = BLEND_PREMULTIPLIED
+
+        batch = Widget._blit_batch
+
+        if batch is None:
+            target.blit(image, position, area, flags)
+        else:
+            batch.blit(image, position, area, target, flags)
+
+    def _blit(self, image, surface = None, offset : tuple[int, int] = (0, 0)) -> None:
+        """blit image at the widget's position, onto surface moved by offset, or onto the widget's surface"""
+
+        x, y = self.position
+        region = None if self._atlas is None else self._atlas.region(image)
+
+        if region is None:
+            self._blit_onto(surface, image, (x - offset[0], y - offset[1]))
+        else:
+            self._blit_onto(surface, region[0], (x - offset[0], y - offset[1]), region[1])
+
+    def _blit_clipped(self, surface = None, offset : tuple[int, int] = (0, 0)) -> None:
+        """blit the image clipped to the parent"""
+
+        area = self._clip_area
+
+        if area is None:
+            self._blit(self.clipped_image, surface, offset)
+        elif area.width and area.height:
+            x, y = self.position
+            position = (x + area.x - offset[0], y + area.y - offset[1])
+            region = None if self._atlas is None else self._atlas.region(self._image)
+
+            if region is None:
+                self._blit_onto(surface, self._image, position, area)
+            else:
+                self._blit_onto(surface, region[0], position, area.move(region[1].topleft))
+
+    @property
+    def atlas(self):
+        """the TextureAtlas the widget's image is drawn from, if any"""
+
+        return self._atlas
+
+    @atlas.setter
+    def atlas(self, atlas) -> None:
+        """Setter for atlas"""
+
+        self.set_atlas(atlas)
+
+    def set_atlas(self, atlas) -> bool:
+        """pack the widget's image into atlas and draw it from there. Returns False when the image could not be packed.
+
+        An image that changes afterwards is drawn on its own until it is packed again."""
+
+        self._atlas = atlas
+
+        if atlas is None or self._image is None:
+            return False
+
+        return atlas.add(self._image) is not None
+
+    def draw_self(self, surface = None, offset : tuple[int, int] = (0, 0)) -> None:
+        """draw this widget only. surface and offset are given while rendering a cached layer"""
+
+        pass
+
+    def update_self(self) -> None:
+        """update this widget only"""
+
+        if self._dirty_rects is not None and self.rect != self._drawn_rect:
+            self.mark_dirty()
+
+    def draw(self) -> None:
+        """draw this widget and all of its subwidgets, in draw order."""
+
+        Widget._draw_widgets(self.display_list())
+
+    def update(self) -> None:
+        """update this widget and all of its subwidgets, parents before their subwidgets."""
+
+        for widget in self.display_list():
+            widget.update_self()
 
     def add_widget(self, widget) -> None:
         """add a widget to the list of widgets"""
 
-        self._widgets.add(widget)
+        if widget._parent is not None:
+            widget._parent.remove_widget(widget)
+
+        Widget._add_serial += 1
+        widget._serial = Widget._add_serial
+
+        widgets = self._widgets
+        widgets.append(widget)
+
+        if len(widgets) > 1 and widgets[-2]._z > widget._z:
+            widgets.sort(key=Widget._z_key)
+
+        widget._display_list = None
         widget._set_parent(self)
-        widget.set_position(widget.x + self.x, widget.y + self.y)
+        self._invalidate_display_list()
+        self.invalidate_layer()
+
+        root = self.root()
+        root._pointer_widgets.update(widget._pointer_widgets)
+        widget._pointer_widgets = set()
+        widget._spatial_index = None
+        widget._moved_widgets = set()
+
+        if root._spatial_index is not None:
+            for subwidget in widget._subtree():
+                subwidget._index(root._spatial_index)
+
+        if self._dirty_rects is not None:
+            widget.set_dirty_rects(self._dirty_rects)
 
     def process_events(self, event) -> None:
+        """pass the event to every subwidget and then handle it.
+
+        Pointer events reaching a root widget only go to the widgets under the pointer and the widgets holding it.
+        Their process_events is called with the event, and handles it without passing it to their subwidgets."""
+
+        if event.type in POINTER_EVENTS:
+            if Widget._routing_pointer:
+                self.handle_event(event)
+                return
+
+            if self._parent is None:
+                self._route_pointer_event(event)
+                return
+
         for widget in self._widgets:
             widget.process_events(event)
 
+        self.handle_event(event)
+
+    def _route_pointer_event(self, event) -> None:
+        if self._spatial_index is None:
+            self.build_spatial_index()
+        else:
+            self._reindex_moved()
+
+        targets = set(self._spatial_index.query_point(*event.pos))
+        targets.update(self._pointer_widgets)
+
+        if not targets:
+            return
+
+        # the topmost widget gets the event first
+        self.display_list()
+
+        outer_routing = Widget._routing_pointer
+        Widget._routing_pointer = True
+
+        try:
+            for widget in sorted(targets, key=Widget._display_order, reverse=True):
+                widget.process_events(event)
+        finally:
+            Widget._routing_pointer = outer_routing
+
+    @staticmethod
+    def _display_order(widget) -> int:
+        return widget._display_span[0]
+
+    def handle_event(self, event) -> None:
+        """handle an event for this widget only. Override this rather than process_events."""
+
+        pass
 
     def remove_widget(self, widget) -> bool:
         """remove a widget from the list of widgets"""
@@ -55,12 +834,35 @@ class Widget(GameObject, ImplementsPosition, ImplementsSprite):
         if widget not in self._widgets:
             return False
 
+        # the widget stays where it is on screen
+        x, y = widget.position
+
         self._widgets.remove(widget)
+        widget._set_parent(None)
+        widget._x, widget._y = x, y
+        widget._transform_dirty = True
+        self._invalidate_display_list()
+        self.invalidate_layer()
+
+        root = self.root()
+        subtree = set(widget.walk())
+        widget._pointer_widgets = root._pointer_widgets & subtree
+        root._pointer_widgets -= subtree
+        root._moved_widgets -= subtree
+
+        if root._spatial_index is not None:
+            for subwidget in subtree:
+                root._spatial_index.remove(subwidget)
+
+        if self._dirty_rects is not None:
+            self._dirty_rects.mark(widget._drawn_rect)
 
         return True
 
 
 class StaticWindowWidget(Widget, ImplementsPosition):
+    _batched_draw = True
+
     def __init__(
         self,
         parent = None,
@@ -70,39 +872,29 @@ class StaticWindowWidget(Widget, ImplementsPosition):
         name : str = None,
         active : bool = True,
         tags = None,
+        mask = None,
+        rectangular = None,
         ):
 
         super().__init__(parent, surface, name, active, tags)
 
-        self._x = position[0] + (0 if parent is None else parent.x)
-        self._y = position[1] + (0 if parent is None else parent.y)
+        self._x, self._y = position
 
         self._image = image
 
-        self._mask = from_surface(self._image)
+        self._mask = from_surface(self._image) if mask is None else mask
+        self._rectangular = rectangular
 
-        o_x = None if parent is None else parent.x - self.x
-        o_y = None if parent is None else parent.y - self.y
-        self._overlap_mask = None if parent is None else self.mask.overlap_mask(parent.mask, (o_x, o_y))
+        self.update_clip()
 
-    def draw(self) -> None:
+    def draw_self(self, surface = None, offset : tuple[int, int] = (0, 0)) -> None:
         if self.active:
-            if self._overlap_mask is None:
-                image = self._image
-            else:
-                image = self._overlap_mask.to_surface(unsetcolor=(0,0,0,0), setcolor=(255,255,255,255))
-                image.blit(self._image, (0,0), special_flags=BLEND_RGBA_MULT)
+            self._blit_clipped(surface, offset)
 
-            self._surface.blit(image, self.position)
-        super().draw()
+    def update_self(self) -> None:
+        self.update_clip()
 
-    def update(self) -> None:
-        o_x = None if self._parent is None else self._parent.x - self.x
-        o_y = None if self._parent is None else self._parent.y - self.y
-
-        self._overlap_mask = None if self._parent is None else self.mask.overlap_mask(self._parent.mask, (o_x, o_y))
-
-        super().update()
+        super().update_self()
 
     @property
     def image(self):
@@ -113,12 +905,18 @@ class StaticWindowWidget(Widget, ImplementsPosition):
         return self._mask
 
     def set_overlap_mask(self, mask):
-        self._overlap_mask = mask.to_surface(unsetcolor=(0,0,0,0), setcolor=(255,255,255,255))
+        self._overlap_mask = mask
+        self._clip_area = None
+        self._clipped_image = mask.to_surface(unsetcolor=(0,0,0,0), setcolor=(255,255,255,255))
+        self._clipped_image.blit(self._image, (0,0), special_flags=BLEND_RGBA_MULT)
+        self.invalidate_layer()
 
 
 class AbstractButtonWidget(Widget, ImplementsPosition):
     """the abstract button widget will serve as a base class for any button"""
 
+    _batched_draw = True
+
     def __init__(
         self,
         text : str = "",
@@ -128,21 +926,21 @@ class AbstractButtonWidget(Widget, ImplementsPosition):
         image = None,
         position : tuple[int, int] = (0, 0),
         active : bool = True,
-        tags = None
+        tags = None,
+        mask = None,
+        rectangular = None,
         ):
 
         super().__init__(parent, surface, name, active, tags)
 
-        self._x = position[0] + (0 if parent is None else parent.x)
-        self._y = position[1] + (0 if parent is None else parent.y)
+        self._x, self._y = position
 
         self._image = image
 
-        self._mask = from_surface(self._image)
+        self._mask = from_surface(self._image) if mask is None else mask
+        self._rectangular = rectangular
 
-        o_x = None if parent is None else parent.x - self.x
-        o_y = None if parent is None else parent.y - self.y
-        self._overlap_mask = None if parent is None else self._mask.overlap_mask(parent._mask, (o_x, o_y))
+        self.update_clip()
         self._hovering = False
         self._pressed = False
 
@@ -152,41 +950,36 @@ class AbstractButtonWidget(Widget, ImplementsPosition):
     on_hover = Signal(None)
     on_hover_exit = Signal(None)
 
-    def draw(self) -> None:
+    def draw_self(self, surface = None, offset : tuple[int, int] = (0, 0)) -> None:
         if self.active:
-            if self._overlap_mask is None:
-                image = self._image
-            else:
-                image = self._overlap_mask.to_surface(unsetcolor=(0,0,0,0), setcolor=(255,255,255,255))
-                image.blit(self._image, (0,0), special_flags=BLEND_RGBA_MULT)
+            self._blit_clipped(surface, offset)
 
-            self._surface.blit(image, self.position)
-        super().draw()
+    def update_self(self) -> None:
+        self.update_clip()
 
-    def update(self) -> None:
-        o_x = None if self._parent is None else self._parent.x - self.x
-        o_y = None if self._parent is None else self._parent.y - self.y
+        super().update_self()
 
-        self._overlap_mask = None if self._parent is None else self._mask.overlap_mask(self._parent.mask, (o_x, o_y))
+    def holds_pointer(self) -> bool:
+        return self._hovering or self._pressed
 
-        super().update()
+    def handle_event(self, event):
+        if event.type not in POINTER_EVENTS:
+            return
 
-    def process_events(self, event):
+        rect = self.rect
 
-        super().process_events(event)
+        if rect is None:
+            return
 
-        m_x, m_y = mouse.get_pos()
+        e_x, e_y = event.pos
 
-        if event.type == MOUSEBUTTONDOWN and (
-            self.rect is not None
-            and self.rect.collidepoint(m_x, m_y)
-            ):
+        if event.type == MOUSEBUTTONDOWN and rect.collidepoint(e_x, e_y):
             if not self._pressed:
                 self._pressed = True
 
             self.on_pressed.emit()
-        elif event.type == MOUSEBUTTONUP and self.rect is not None:
-            if self.rect.collidepoint(m_x, m_y):
+        elif event.type == MOUSEBUTTONUP:
+            if rect.collidepoint(e_x, e_y):
                 if self._pressed:
                     self._pressed = False
                     self.on_clicked.emit()
@@ -197,11 +990,78 @@ class AbstractButtonWidget(Widget, ImplementsPosition):
                     self._pressed = False
 
             self.on_released.emit()
-        elif event.type == MOUSEMOTION and self.rect is not None:
-            e_x, e_y = event.pos
-            if not self._hovering and self.rect.collidepoint(e_x, e_y):
+        elif event.type == MOUSEMOTION:
+            if not self._hovering and rect.collidepoint(e_x, e_y):
                 self._hovering = True
                 self.on_hover.emit()
-            elif self._hovering and not self.rect.collidepoint(e_x, e_y):
+            elif self._hovering and not rect.collidepoint(e_x, e_y):
                 self._hovering = False
                 self.on_hover_exit.emit()
+
+        self._update_pointer_hold()
+
+
+class ProfilerOverlayWidget(Widget):
+    """shows the p50, p95 and p99 of every phase a FrameProfiler times"""
+
+    _batched_draw = True
+
+    def __init__(
+        self,
+        profiler,
+        parent = None,
+        surface = None,
+        position : tuple[int, int] = (0, 0),
+        font_size : int = 18,
+        refresh_frames : int = 30,
+        name : str = "ProfilerOverlay",
+        active : bool = True,
+        tags = None,
+        ):
+
+        super().__init__(parent, surface, name, active, tags)
+
+        self._x, self._y = position
+
+        if not font.get_init():
+            font.init()
+
+        self._profiler = profiler
+        self._font = font.Font(None, font_size)
+        self._refresh_frames : int = refresh_frames
+        self._rendered_at : int = -refresh_frames
+
+    def _render(self) -> None:
+        """render the profiler summary into the widget's image"""
+
+        summary = self._profiler.summary()
+        rows = [("ms", "p50", "p95", "p99")] + [
+            (phase, *(f"{summary[phase][p]:.2f}" for p in ("p50", "p95", "p99")))
+            for phase in PHASES + ("frame",)
+            ]
+
+        line_height = self._font.get_linesize()
+        columns = (0, 120, 180, 240)
+
+        image = Surface((columns[-1] + 60, line_height * len(rows) + 8), SRCALPHA)
+        image.fill((0, 0, 0, 160))
+
+        for row_index, row in enumerate(rows):
+            for column, text in zip(columns, row):
+                image.blit(self._font.render(text, True, (255, 255, 255)), (column + 4, row_index * line_height + 4))
+
+        self._image = image
+        self._rendered_at = self._profiler.frames
+        self._moved()
+        self.invalidate_layer()
+        self.mark_dirty()
+
+    def draw_self(self, surface = None, offset : tuple[int, int] = (0, 0)) -> None:
+        if self._image is not None:
+            self._blit(self._image, surface, offset)
+
+    def update_self(self) -> None:
+        if self._profiler.frames - self._rendered_at >= self._refresh_frames:
+            self._render()
+
+        super().update_self()
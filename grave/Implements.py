@@ -2,8 +2,18 @@
 
 from pygame import Rect
 
+from .Capabilities import default_capability_registry
+
 class Implement:
-    """The implement base class does not have a Thing ID"""
+    """The implement base class does not have a Thing ID.
+
+    Instances of the implements default_capability_registry watches are tracked, whether or not their __init__ reaches Implement."""
+
+    def __new__(cls, *args, **kwargs):
+        new = super().__new__
+        instance = new(cls) if new is object.__new__ else new(cls, *args, **kwargs)
+        default_capability_registry.track(instance)
+        return instance
 
     def __init__(self, *args, **kwargs):
         self.validate()
@@ -77,6 +87,10 @@ class Implements2DMove(ImplementsPosition):
 
     _angle : float = 0
 
+    # the MoveBatch the object belongs to, and its row there
+    _batch = None
+    _row : int = 0
+
     def move(self, x : float, y : float) -> None:
         """move in x and y direction"""
 
@@ -116,7 +130,7 @@ class Implements2DMove(ImplementsPosition):
     def angle(self, theta_rads : float) -> None:
         """set the angle of rotation"""
 
-        return self._angle
+        self._angle = theta_rads
 
 
 class ImplementsSprite(Implement):
@@ -143,3 +157,6 @@ class ImplementsSprite(Implement):
         """return a list of rects that determine collisions"""
 
         raise NotImplementedError
+
+
+default_capability_registry.register(Implement)
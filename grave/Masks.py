@@ -0,0 +1,157 @@
+"""A persistent on-disk cache of collision masks"""
+
+import mmap
+import os
+import struct
+
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+from typing import Iterable, Union
+
+import pygame
+
+from .Constants import GRAVE_PROGRAMDATA
+from .Core import Thing
+
+
+GRAVE_MASK_CACHE_DIR = os.path.join(GRAVE_PROGRAMDATA, "pygrave", "masks")
+
+# magic, format version, width, height, bytes per mask word, alpha threshold
+_GRAVE_mask_header = struct.Struct("<4sHIIBB")
+_GRAVE_mask_magic = b"GRVM"
+_GRAVE_mask_version = 1
+
+
+def _mask_key(image_path : str, threshold : int) -> str:
+    """Hash the encoded image file together with the threshold. This is far cheaper than hashing decoded pixels."""
+
+    with open(image_path, "rb") as image_file:
+        digest = blake2b(image_file.read(), digest_size=16)
+
+    digest.update(bytes((threshold,)))
+
+    return digest.hexdigest()
+
+
+def _build_mask_file(cache_dir : str, image_path : str, threshold : int) -> bool:
+    """Compute and store the mask of one image file. Runs in the worker processes of MaskCache.build."""
+
+    cache = MaskCache(cache_dir)
+    key = _mask_key(image_path, threshold)
+
+    if os.path.exists(cache.file_path(key)):
+        return False
+
+    cache.save(key, pygame.mask.from_surface(pygame.image.load(image_path), threshold), threshold)
+
+    return True
+
+
+class MaskCache(Thing):
+    """Stores the masks of image files on disk, keyed by the file's contents and the alpha threshold.
+
+    Masks are stored as the raw words of pygame's bitmask and loaded back through mmap,
+    so a cached mask costs a copy instead of a scan over every pixel."""
+
+    def __init__(self, cache_dir : str = GRAVE_MASK_CACHE_DIR):
+        """Initialize a mask cache stored in cache_dir"""
+
+        super().__init__()
+
+        self._cache_dir : str = cache_dir
+        self._hits : int = 0
+        self._misses : int = 0
+
+    @property
+    def cache_dir(self) -> str:
+        """The directory the masks are stored in"""
+
+        return self._cache_dir
+
+    def stats(self) -> dict[str, int]:
+        """How many masks were loaded from disk and how many had to be computed"""
+
+        return {"hits": self._hits, "misses": self._misses}
+
+    def file_path(self, key : str) -> str:
+        """The path a mask with the given key is stored at"""
+
+        return os.path.join(self._cache_dir, key[:2], f"{key}.mask")
+
+    def load(self, key : str) -> Union[pygame.mask.Mask, None]:
+        """Load a stored mask, or return None when there is no usable one"""
+
+        try:
+            with open(self.file_path(key), "rb") as mask_file:
+                with mmap.mmap(mask_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    magic, version, width, height, word_size, _ = _GRAVE_mask_header.unpack_from(mapped)
+
+                    if magic != _GRAVE_mask_magic or version != _GRAVE_mask_version:
+                        return None
+
+                    mask = pygame.mask.Mask((width, height))
+                    words = memoryview(mask)
+
+                    if word_size != words.itemsize or len(mapped) != _GRAVE_mask_header.size + words.nbytes:
+                        return None
+
+                    words.cast("B")[:] = mapped[_GRAVE_mask_header.size:]
+        except (OSError, ValueError, struct.error):
+            return None
+
+        return mask
+
+    def save(self, key : str, mask : pygame.mask.Mask, threshold : int = 127) -> None:
+        """Store a mask under key. The file is written to a temporary name first, so readers never see half a file"""
+
+        file_path = self.file_path(key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        words = memoryview(mask)
+        width, height = mask.get_size()
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+
+        with open(temp_path, "wb") as mask_file:
+            mask_file.write(_GRAVE_mask_header.pack(_GRAVE_mask_magic, _GRAVE_mask_version, width, height, words.itemsize, threshold))
+            mask_file.write(words.cast("B"))
+
+        os.replace(temp_path, file_path)
+
+    def from_file(self, image_path : str, threshold : int = 127, surface : pygame.Surface = None) -> pygame.mask.Mask:
+        """Get the mask of an image file, computing and storing it on a miss.
+
+        Pass the already loaded surface to skip decoding the file again on a miss."""
+
+        key = _mask_key(image_path, threshold)
+        mask = self.load(key)
+
+        if mask is not None:
+            self._hits += 1
+            return mask
+
+        self._misses += 1
+
+        if surface is None:
+            surface = pygame.image.load(image_path)
+
+        mask = pygame.mask.from_surface(surface, threshold)
+
+        try:
+            self.save(key, mask, threshold)
+        except OSError:
+            pass
+
+        return mask
+
+    def build(self, image_paths : Iterable[str], threshold : int = 127, processes : Union[int, None] = None) -> int:
+        """Compute the masks of every image file that is not cached yet on a process pool, and return how many were built"""
+
+        image_paths = list(image_paths)
+
+        if not image_paths:
+            return 0
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            built = pool.map(_build_mask_file, [self._cache_dir] * len(image_paths), image_paths, [threshold] * len(image_paths))
+
+            return sum(built)
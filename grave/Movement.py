@@ -0,0 +1,300 @@
+"""Vectorized movement for large numbers of Implements2DMove objects"""
+
+from typing import Iterator
+
+import numpy as np
+
+from .Core import Thing
+from .Implements import Implements2DMove
+
+
+class _BatchedMove(Implements2DMove):
+    """Reads and writes the position and angle of a mover through its MoveBatch.
+
+    MoveBatch.add switches the mover's class to a subclass of its own class and this one, so objects
+    outside a batch keep the plain attribute access of Implements2DMove."""
+
+    def get_x(self) -> int:
+        return self._batch.get_x(self._row)
+
+    def get_y(self) -> int:
+        return self._batch.get_y(self._row)
+
+    def set_x(self, x : int) -> None:
+        self._batch.set_x(self._row, x)
+
+    def set_y(self, y : int) -> None:
+        self._batch.set_y(self._row, y)
+
+    def set_position(self, x : int, y : int) -> None:
+        """set X and Y"""
+
+        self._batch.set_x(self._row, x)
+        self._batch.set_y(self._row, y)
+
+    @property
+    def position(self) -> tuple[int, int]:
+        """Get X and Y as a tuple"""
+
+        return (self._batch.get_x(self._row), self._batch.get_y(self._row))
+
+    @position.setter
+    def position(self, xy : tuple[int, int]) -> None:
+        """set X and Y"""
+
+        self.set_position(*xy)
+
+    @property
+    def x(self) -> int:
+        """get the x position"""
+
+        return self._batch.get_x(self._row)
+
+    @x.setter
+    def x(self, X : int) -> None:
+        """set the x position"""
+
+        self._batch.set_x(self._row, X)
+
+    @property
+    def y(self) -> int:
+        """get the y position"""
+
+        return self._batch.get_y(self._row)
+
+    @y.setter
+    def y(self, Y : int) -> None:
+        """set the y position"""
+
+        self._batch.set_y(self._row, Y)
+
+    def move(self, x : float, y : float) -> None:
+        """move in x and y direction"""
+
+        self.set_position(int(self.get_x() + x), int(self.get_y() + y))
+
+    def move_and_roate(self, x : float, y : float, theta_rads : float) -> None:
+        """move and rotate at the same time"""
+
+        self.move(x, y)
+        self.rotate(theta_rads)
+
+    def move_x(self, x : float) -> None:
+        """move in the x direction"""
+
+        self.set_x(int(self.get_x() + x))
+
+    def move_y(self, y : float) -> None:
+        """move in the y direction"""
+
+        self.set_y(int(self.get_y() + y))
+
+    def rotate(self, theta_rads : float) -> None:
+        """rotate in the direction"""
+
+        self._batch.set_angle(self._row, self._batch.get_angle(self._row) + theta_rads)
+
+    @property
+    def angle(self) -> float:
+        """get the angle of rotation"""
+
+        return self._batch.get_angle(self._row)
+
+    @angle.setter
+    def angle(self, theta_rads : float) -> None:
+        """set the angle of rotation"""
+
+        self._batch.set_angle(self._row, theta_rads)
+
+
+# mover class -> its batched subclass
+_batched_classes : dict[type, type] = dict()
+
+
+def _batched_class(cls : type) -> type:
+    """The subclass of cls a mover is switched to while it belongs to a batch"""
+
+    batched = _batched_classes.get(cls)
+
+    if batched is None:
+        batched = _batched_classes[cls] = type(f"Batched{cls.__name__}", (cls, _BatchedMove), {"__module__": cls.__module__})
+        batched._unbatched = cls
+
+    return batched
+
+
+class MoveBatch(Thing):
+    """Keeps the positions, velocities and angles of many movers in NumPy arrays and moves them all at once.
+
+    A mover added to the batch reads and writes its x, y, position and angle through the batch until it is removed.
+    While it is in the batch its class is a subclass of its own class, so isinstance checks still hold.
+    Positions are kept as floats, so motion of less than a pixel per step adds up. They are truncated to whole
+    numbers only when they are read through a mover, like Implements2DMove.move."""
+
+    def __init__(self, capacity : int = 256):
+        """Initialize an empty batch with room for capacity movers"""
+
+        super().__init__()
+
+        self._count : int = 0
+        self._movers : list[Implements2DMove] = []
+
+        self._positions : np.ndarray = np.zeros((capacity, 2), dtype=np.float64)
+        self._velocities : np.ndarray = np.zeros((capacity, 2), dtype=np.float64)
+        self._angles : np.ndarray = np.zeros(capacity, dtype=np.float64)
+        self._spins : np.ndarray = np.zeros(capacity, dtype=np.float64)
+
+    def _grow(self) -> None:
+        """Double the capacity of every array"""
+
+        capacity = max(1, 2 * len(self._angles))
+
+        for name in ("_positions", "_velocities", "_angles", "_spins"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._count] = old[:self._count]
+            setattr(self, name, new)
+
+    def add(self, mover : Implements2DMove, velocity : tuple[float, float] = (0.0, 0.0), spin : float = 0.0) -> None:
+        """Move the mover's position and angle into the batch"""
+
+        if mover._batch is self:
+            return
+
+        if mover._batch is not None:
+            mover._batch.remove(mover)
+
+        if self._count == len(self._angles):
+            self._grow()
+
+        row = self._count
+        self._positions[row] = (mover._x, mover._y)
+        self._velocities[row] = velocity
+        self._angles[row] = mover._angle
+        self._spins[row] = spin
+
+        self._movers.append(mover)
+        self._count += 1
+
+        mover._batch = self
+        mover._row = row
+        mover.__class__ = _batched_class(type(mover))
+
+    def remove(self, mover : Implements2DMove) -> bool:
+        """Copy the mover's position and angle back to it and take it out of the batch"""
+
+        if mover._batch is not self:
+            return False
+
+        row = mover._row
+        last = self._count - 1
+
+        mover.__class__ = mover._unbatched
+        mover._batch = None
+        mover._x, mover._y = self.get_x(row), self.get_y(row)
+        mover._angle = float(self._angles[row])
+
+        if row != last:
+            moved = self._movers[last]
+            self._movers[row] = moved
+            moved._row = row
+
+            for array in (self._positions, self._velocities, self._angles, self._spins):
+                array[row] = array[last]
+
+        self._movers.pop()
+        self._count -= 1
+
+        return True
+
+    @property
+    def positions(self) -> np.ndarray:
+        """An (n, 2) view of every position"""
+
+        return self._positions[:self._count]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        """An (n, 2) view of every velocity, in pixels per step"""
+
+        return self._velocities[:self._count]
+
+    @property
+    def angles(self) -> np.ndarray:
+        """A view of every angle"""
+
+        return self._angles[:self._count]
+
+    @property
+    def spins(self) -> np.ndarray:
+        """A view of every angular velocity, in radians per step"""
+
+        return self._spins[:self._count]
+
+    def movers(self) -> list[Implements2DMove]:
+        """The movers in row order"""
+
+        return self._movers
+
+    def set_velocity(self, mover : Implements2DMove, x : float, y : float) -> None:
+        """set the velocity of a mover in the batch"""
+
+        self._velocities[mover._row] = (x, y)
+
+    def set_spin(self, mover : Implements2DMove, theta_rads : float) -> None:
+        """set the angular velocity of a mover in the batch"""
+
+        self._spins[mover._row] = theta_rads
+
+    def get_x(self, row : int) -> int:
+        return int(self._positions[row, 0])
+
+    def get_y(self, row : int) -> int:
+        return int(self._positions[row, 1])
+
+    def set_x(self, row : int, x : int) -> None:
+        self._positions[row, 0] = x
+
+    def set_y(self, row : int, y : int) -> None:
+        self._positions[row, 1] = y
+
+    def get_angle(self, row : int) -> float:
+        return float(self._angles[row])
+
+    def set_angle(self, row : int, theta_rads : float) -> None:
+        self._angles[row] = theta_rads
+
+    def move(self, x, y) -> None:
+        """move every mover. x and y are numbers or arrays with one value per mover"""
+
+        positions = self.positions
+        positions[:, 0] += x
+        positions[:, 1] += y
+
+    def rotate(self, theta_rads) -> None:
+        """rotate every mover. theta_rads is a number or an array with one value per mover"""
+
+        self.angles[:] += theta_rads
+
+    def move_and_roate(self, x, y, theta_rads) -> None:
+        """move and rotate every mover at the same time"""
+
+        self.move(x, y)
+        self.rotate(theta_rads)
+
+    def step(self, dt : float = 1.0) -> None:
+        """advance every mover by its velocity and angular velocity"""
+
+        positions = self.positions
+        positions += self.velocities * dt
+
+        self.angles[:] += self.spins * dt
+
+    def __contains__(self, mover : Implements2DMove) -> bool:
+        return mover._batch is self
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Implements2DMove]:
+        return iter(self._movers)
@@ -0,0 +1,157 @@
+"""Per-phase timing of the game loop"""
+
+import csv
+import json
+
+from array import array
+from math import ceil
+from time import perf_counter
+from typing import Iterable
+
+from .Core import Thing
+
+
+PHASES = (
+    "clock_wait",
+    "event_pump",
+    "process_event",
+    "signals",
+    "update_scene",
+    "draw",
+    "present",
+    )
+
+
+class FrameProfiler(Thing):
+    """Times each phase of every frame and keeps the last capacity frames in a ring buffer"""
+
+    def __init__(self, capacity : int = 600):
+        """Initialize a profiler that remembers the last capacity frames"""
+
+        super().__init__()
+
+        self._capacity : int = capacity
+        self._index : int = 0
+        self._count : int = 0
+        self._frames : int = 0
+
+        self._samples : dict[str, array] = {
+            phase: array('d', bytes(8 * capacity))
+            for phase in PHASES + ("frame",)
+            }
+        self._current : dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self._frame_start : float = 0.0
+        self._last : float = 0.0
+
+    @property
+    def capacity(self) -> int:
+        """How many frames the ring buffer holds"""
+
+        return self._capacity
+
+    @property
+    def frames(self) -> int:
+        """How many frames were recorded in total"""
+
+        return self._frames
+
+    def next_frame(self) -> None:
+        """Store the frame timed so far, if any, and start timing a new one"""
+
+        now = perf_counter()
+
+        if self._frame_start:
+            index = self._index
+
+            for phase, seconds in self._current.items():
+                self._samples[phase][index] = seconds
+                self._current[phase] = 0.0
+
+            self._samples["frame"][index] = now - self._frame_start
+
+            self._index = (index + 1) % self._capacity
+            self._count = min(self._count + 1, self._capacity)
+            self._frames += 1
+
+        self._frame_start = self._last = now
+
+    def mark(self, phase : str) -> None:
+        """Charge the time since the last mark to phase"""
+
+        now = perf_counter()
+        self._current[phase] += now - self._last
+        self._last = now
+
+    def reset(self) -> None:
+        """Forget every recorded frame"""
+
+        self._index = self._count = self._frames = 0
+        self._frame_start = self._last = 0.0
+        self._current = dict.fromkeys(PHASES, 0.0)
+
+    def samples(self, phase : str) -> list[float]:
+        """The recorded seconds of a phase, oldest frame first"""
+
+        ring = self._samples[phase]
+
+        if self._count < self._capacity:
+            return ring[:self._count].tolist()
+
+        return ring[self._index:].tolist() + ring[:self._index].tolist()
+
+    def percentiles(self, phase : str, percents : Iterable[float] = (50, 95, 99)) -> dict[str, float]:
+        """Nearest rank percentiles of a phase in seconds, keyed like p50"""
+
+        ordered = sorted(self.samples(phase))
+
+        if not ordered:
+            return {f"p{percent:g}": 0.0 for percent in percents}
+
+        last = len(ordered) - 1
+
+        return {
+            f"p{percent:g}": ordered[min(last, max(0, ceil(percent * len(ordered) / 100) - 1))]
+            for percent in percents
+            }
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """p50, p95, p99, mean and max in milliseconds for every phase and the whole frame"""
+
+        summary = dict()
+
+        for phase in PHASES + ("frame",):
+            samples = self.samples(phase)
+            stats = {name: seconds * 1000 for name, seconds in self.percentiles(phase).items()}
+            stats["mean"] = 1000 * sum(samples) / len(samples) if samples else 0.0
+            stats["max"] = 1000 * max(samples) if samples else 0.0
+            summary[phase] = stats
+
+        return summary
+
+    def to_csv(self, file_path : str) -> None:
+        """Write one row of milliseconds per recorded frame"""
+
+        columns = PHASES + ("frame",)
+        rows = zip(*(self.samples(phase) for phase in columns))
+
+        with open(file_path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(columns)
+            writer.writerows([f"{seconds * 1000:.4f}" for seconds in row] for row in rows)
+
+    def to_json(self, file_path : str) -> None:
+        """Write the summary and the recorded frames in milliseconds"""
+
+        with open(file_path, "w") as json_file:
+            json.dump(
+                {
+                    "frames": self._frames,
+                    "summary": self.summary(),
+                    "samples": {
+                        phase: [seconds * 1000 for seconds in self.samples(phase)]
+                        for phase in PHASES + ("frame",)
+                        },
+                    },
+                json_file,
+                indent=2,
+                )
@@ -0,0 +1,447 @@
+"""Rendering helpers that keep the per-frame drawing cost down"""
+
+from collections import OrderedDict
+from math import tau
+from typing import Union
+
+from pygame import Rect, Surface, BLEND_RGBA_MAX, SRCALPHA, transform
+from pygame.mask import Mask, from_surface
+
+from .Core import Thing
+
+
+def merge_rects(rects) -> list[Rect]:
+    """Merge every group of overlapping rects into a single rect"""
+
+    merged : list[Rect] = []
+
+    for rect in rects:
+        rect = Rect(rect)
+        index = rect.collidelist(merged)
+
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+
+        merged.append(rect)
+
+    return merged
+
+
+class DirtyRects(Thing):
+    """Collects the regions of a surface that changed since the last present"""
+
+    def __init__(self, bounds : Rect, enabled : bool = False):
+        """Initialize a dirty rect tracker for a surface of the given bounds"""
+
+        super().__init__()
+
+        self._bounds : Rect = Rect(bounds)
+        self._rects : list[Rect] = []
+        self._full : bool = True
+        self._enabled : bool = enabled
+
+    @property
+    def enabled(self) -> bool:
+        """Is the tracker recording regions?"""
+
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, is_enabled : bool) -> None:
+        """Setter for enabled. Disabling drops every recorded region"""
+
+        self._enabled = is_enabled
+        self._rects.clear()
+        self._full = True
+
+    @property
+    def bounds(self) -> Rect:
+        """The bounds of the tracked surface"""
+
+        return self._bounds
+
+    def mark(self, rect) -> None:
+        """Record a changed region. Regions outside the bounds are ignored"""
+
+        if not self._enabled or self._full or rect is None:
+            return
+
+        rect = self._bounds.clip(rect)
+
+        if rect.w and rect.h:
+            self._rects.append(rect)
+
+    def invalidate(self) -> None:
+        """Request a full redraw on the next present"""
+
+        if self._enabled:
+            self._full = True
+            self._rects.clear()
+
+    def flush(self, threshold : float = 0.5) -> Union[list[Rect], None]:
+        """Return the merged regions to redraw, or None when the whole surface must be redrawn.
+
+        A full redraw is requested when the merged regions cover more than threshold of the surface."""
+
+        full, self._full = self._full, False
+        rects, self._rects = self._rects, []
+
+        if full:
+            return None
+
+        merged = merge_rects(rects)
+
+        limit = threshold * self._bounds.w * self._bounds.h
+        if sum(rect.w * rect.h for rect in merged) > limit:
+            return None
+
+        return merged
+
+
+class RotationCache(Thing):
+    """Rotated copies of images, keyed by the image and the angle rounded to one of steps directions.
+
+    Each entry also holds the offset that keeps the rotated image centered where the unrotated one was,
+    and, once asked for, the rotated mask. The least recently used entries are dropped when the cache
+    holds more than budget_bytes of pixels and masks. Angles are in radians and turn counterclockwise,
+    like Implements2DMove.angle."""
+
+    def __init__(self, steps : int = 72, budget_bytes : int = 64 * 1024 * 1024, smooth : bool = False):
+        """Initialize an empty cache that rounds angles to steps directions"""
+
+        super().__init__()
+
+        self._steps : int = steps
+        self._budget : int = budget_bytes
+        self._smooth : bool = smooth
+
+        # (image, step) -> [rotated image, rotated mask or None, offset, bytes]
+        self._entries : OrderedDict[tuple[Surface, int], list] = OrderedDict()
+        self._bytes : int = 0
+
+        self._hits : int = 0
+        self._misses : int = 0
+        self._evictions : int = 0
+
+    @property
+    def steps(self) -> int:
+        """How many directions a full turn is rounded to"""
+
+        return self._steps
+
+    @property
+    def budget(self) -> int:
+        """How many bytes of rotated images and masks the cache may hold"""
+
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget_bytes : int) -> None:
+        """Setter for budget. Shrinking it evicts entries right away"""
+
+        self._budget = budget_bytes
+        self._evict()
+
+    def stats(self) -> dict[str, int]:
+        """Cache hits, misses, evictions and the bytes currently held"""
+
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "bytes": self._bytes,
+            "entries": len(self._entries),
+            }
+
+    def step(self, angle : float) -> int:
+        """The direction an angle in radians is rounded to"""
+
+        return round(angle * self._steps / tau) % self._steps
+
+    def _evict(self) -> None:
+        while self._bytes > self._budget and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry[3]
+            self._evictions += 1
+
+    def _entry(self, image : Surface, angle : float) -> list:
+        key = (image, self.step(angle))
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+        self._misses += 1
+
+        degrees = key[1] * 360 / self._steps
+
+        if degrees == 0:
+            rotated = image
+        elif self._smooth:
+            rotated = transform.rotozoom(image, degrees, 1)
+        else:
+            rotated = transform.rotate(image, degrees)
+
+        width, height = image.get_size()
+        r_width, r_height = rotated.get_size()
+        size = 0 if rotated is image else rotated.get_pitch() * r_height
+
+        entry = self._entries[key] = [rotated, None, ((width - r_width) // 2, (height - r_height) // 2), size]
+        self._bytes += size
+        self._evict()
+
+        return entry
+
+    def image(self, image : Surface, angle : float) -> Surface:
+        """The image rotated by angle"""
+
+        return self._entry(image, angle)[0]
+
+    def offset(self, image : Surface, angle : float) -> tuple[int, int]:
+        """What to add to the unrotated image's position to keep the rotated image centered on it"""
+
+        return self._entry(image, angle)[2]
+
+    def mask(self, image : Surface, angle : float) -> Mask:
+        """The mask of the image rotated by angle. Masks are shared, so copy one before drawing on it"""
+
+        entry = self._entry(image, angle)
+
+        if entry[1] is None:
+            entry[1] = from_surface(entry[0])
+            width, height = entry[1].get_size()
+            # pygame stores masks in bits
+            mask_bytes = (width + 7) // 8 * height
+            entry[3] += mask_bytes
+            self._bytes += mask_bytes
+            self._evict()
+
+        return entry[1]
+
+    def get(self, image : Surface, angle : float) -> tuple[Surface, tuple[int, int]]:
+        """The image rotated by angle and its offset"""
+
+        entry = self._entry(image, angle)
+
+        return entry[0], entry[2]
+
+    def blit(self, target : Surface, image : Surface, position : tuple[int, int], angle : float) -> Rect:
+        """Blit the image rotated by angle, centered where the unrotated image at position would be"""
+
+        rotated, _, (o_x, o_y), _ = self._entry(image, angle)
+
+        return target.blit(rotated, (position[0] + o_x, position[1] + o_y))
+
+    def clear(self) -> None:
+        """Drop every entry"""
+
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BlitBatch(Thing):
+    """Collects blits and submits them with Surface.blits, one call per run of blits onto the same surface.
+
+    Blits are submitted in the order they were added. Anything that draws onto a target without going through
+    the batch must flush it first, or it will be drawn under the blits still waiting in the batch."""
+
+    def __init__(self, target : Union[Surface, None] = None):
+        """Initialize an empty batch that blits onto target unless a blit names its own"""
+
+        super().__init__()
+
+        self._target : Union[Surface, None] = target
+        self._blits : list[tuple] = []
+
+        self._calls : int = 0
+        self._blitted : int = 0
+
+    @property
+    def target(self) -> Union[Surface, None]:
+        """The surface the waiting blits go onto"""
+
+        return self._target
+
+    def blit(
+        self,
+        source : Surface,
+        dest : tuple[int, int],
+        area : Union[Rect, None] = None,
+        target : Union[Surface, None] = None,
+        flags : int = 0,
+        ) -> None:
+        """Add a blit of source, or of its area, at dest. Blitting onto another target flushes the batch first"""
+
+        if target is not None and target is not self._target:
+            self.flush()
+            self._target = target
+
+        if flags:
+            self._blits.append((source, dest, area, flags))
+        elif area is None:
+            self._blits.append((source, dest))
+        else:
+            self._blits.append((source, dest, area))
+
+    def flush(self) -> int:
+        """Submit the waiting blits and return how many there were"""
+
+        blits = self._blits
+
+        if not blits:
+            return 0
+
+        self._blits = []
+        self._target.blits(blits, doreturn=False)
+
+        self._calls += 1
+        self._blitted += len(blits)
+
+        return len(blits)
+
+    def stats(self) -> dict[str, int]:
+        """How many Surface.blits calls were made, how many blits they submitted and how many are waiting"""
+
+        return {
+            "calls": self._calls,
+            "blits": self._blitted,
+            "waiting": len(self._blits),
+            }
+
+    def __len__(self) -> int:
+        return len(self._blits)
+
+
+class TextureAtlas(Thing):
+    """Packs small images into a few shared pages, so they are drawn from one surface by their sub-rect.
+
+    Images are placed left to right on shelves as tall as the tallest image on them, and a new page is started
+    when the last one is full. Images larger than max_size are not packed. The pages hold copies, so an image
+    that is drawn on after it was added must be added again."""
+
+    def __init__(self, page_size : tuple[int, int] = (1024, 1024), max_size : tuple[int, int] = (128, 128), padding : int = 1):
+        """Initialize an atlas without pages"""
+
+        super().__init__()
+
+        self._page_size : tuple[int, int] = page_size
+        self._max_size : tuple[int, int] = (min(max_size[0], page_size[0]), min(max_size[1], page_size[1]))
+        self._padding : int = padding
+
+        self._pages : list[Surface] = []
+        self._regions : dict[Surface, tuple[Surface, Rect]] = dict()
+
+        # where the next image goes on the last page: the shelf's left edge, top and height
+        self._shelf_x : int = 0
+        self._shelf_y : int = 0
+        self._shelf_height : int = 0
+
+        self._used : int = 0
+
+    @property
+    def pages(self) -> list[Surface]:
+        """The shared surfaces the images are packed into"""
+
+        return self._pages
+
+    def _new_page(self) -> Surface:
+        page = Surface(self._page_size, SRCALPHA)
+        page.fill((0, 0, 0, 0))
+
+        self._pages.append(page)
+        self._shelf_x = self._shelf_y = self._shelf_height = 0
+
+        return page
+
+    def _place(self, width : int, height : int) -> tuple[Surface, int, int]:
+        """Find room for a width by height image, starting a new shelf or page when needed"""
+
+        page_width, page_height = self._page_size
+        padding = self._padding
+
+        if not self._pages:
+            self._new_page()
+
+        if self._shelf_x + width > page_width:
+            self._shelf_x = 0
+            self._shelf_y += self._shelf_height + padding
+            self._shelf_height = 0
+
+        if self._shelf_y + height > page_height:
+            self._new_page()
+
+        x, y = self._shelf_x, self._shelf_y
+        self._shelf_x += width + padding
+        self._shelf_height = max(self._shelf_height, height)
+
+        return self._pages[-1], x, y
+
+    def add(self, image : Surface) -> Union[tuple[Surface, Rect], None]:
+        """Pack image and return its page and sub-rect, or None when it is too large to pack"""
+
+        region = self._regions.get(image)
+
+        if region is not None:
+            return region
+
+        width, height = image.get_size()
+        max_width, max_height = self._max_size
+
+        if not width or not height or width > max_width or height > max_height:
+            return None
+
+        page, x, y = self._place(width, height)
+        rect = Rect(x, y, width, height)
+
+        # the page is transparent there, so taking the maximum copies per-pixel alpha exactly
+        page.blit(image, rect, special_flags=BLEND_RGBA_MAX if image.get_flags() & SRCALPHA else 0)
+
+        region = self._regions[image] = (page, rect)
+        self._used += width * height
+
+        return region
+
+    def region(self, image : Surface) -> Union[tuple[Surface, Rect], None]:
+        """The page and sub-rect of image, or None when it was not packed"""
+
+        return self._regions.get(image)
+
+    def blit(self, target : Surface, image : Surface, position : tuple[int, int]) -> Rect:
+        """Blit image at position, from its page when it was packed"""
+
+        region = self._regions.get(image)
+
+        if region is None:
+            return target.blit(image, position)
+
+        return target.blit(region[0], position, region[1])
+
+    def stats(self) -> dict[str, int]:
+        """How many images and pages there are, the bytes the pages hold and the pixels the images cover"""
+
+        return {
+            "images": len(self._regions),
+            "pages": len(self._pages),
+            "bytes": sum(page.get_pitch() * page.get_height() for page in self._pages),
+            "used": self._used,
+            }
+
+    def clear(self) -> None:
+        """Drop every page"""
+
+        self._pages.clear()
+        self._regions.clear()
+        self._shelf_x = self._shelf_y = self._shelf_height = 0
+        self._used = 0
+
+    def __contains__(self, image : Surface) -> bool:
+        return image in self._regions
+
+    def __len__(self) -> int:
+        return len(self._regions)
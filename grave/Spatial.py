@@ -0,0 +1,169 @@
+"""Spatial indexes for finding things by position without scanning all of them"""
+
+from typing import Any, Hashable, Iterator
+
+from .Core import Thing
+
+
+class SpatialGrid(Thing):
+    """A uniform grid that buckets items by the cells their rect covers"""
+
+    def __init__(self, cell_size : int = 128):
+        """Initialize an empty grid with square cells of the given size"""
+
+        super().__init__()
+
+        self._cell_size : int = cell_size
+        self._cells : dict[tuple[int, int], set[Hashable]] = dict()
+        self._items : dict[Hashable, tuple[tuple[int, int, int, int], tuple[tuple[int, int], ...]]] = dict()
+
+    @property
+    def cell_size(self) -> int:
+        """The width and height of a cell"""
+
+        return self._cell_size
+
+    def _cells_of(self, rect : tuple[int, int, int, int]) -> tuple[tuple[int, int], ...]:
+        """Get every cell a rect covers"""
+
+        x, y, w, h = rect
+        size = self._cell_size
+        c_x, c_y = x // size, y // size
+        last_x, last_y = (x + max(w, 1) - 1) // size, (y + max(h, 1) - 1) // size
+
+        # most rects are smaller than a cell
+        if c_x == last_x and c_y == last_y:
+            return ((c_x, c_y),)
+
+        return tuple(
+            (cell_x, cell_y)
+            for cell_x in range(c_x, last_x + 1)
+            for cell_y in range(c_y, last_y + 1)
+            )
+
+    def insert(self, item : Hashable, rect : Any) -> None:
+        """Add an item covering rect, or move it if it is already in the grid"""
+
+        rect = tuple(map(int, rect))
+        old = self._items.get(item)
+
+        if old is not None:
+            old_rect, old_cells = old
+
+            if old_rect == rect:
+                return
+
+            cells = self._cells_of(rect)
+
+            if cells == old_cells:
+                self._items[item] = (rect, cells)
+                return
+
+            self.remove(item)
+        else:
+            cells = self._cells_of(rect)
+
+        self._items[item] = (rect, cells)
+
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                self._cells[cell] = {item}
+            else:
+                bucket.add(item)
+
+    update = insert
+
+    def remove(self, item : Hashable) -> bool:
+        """Remove an item from the grid"""
+
+        if item not in self._items:
+            return False
+
+        _, cells = self._items.pop(item)
+
+        for cell in cells:
+            bucket = self._cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self._cells[cell]
+
+        return True
+
+    def rect(self, item : Hashable) -> tuple[int, int, int, int]:
+        """Get the rect an item was inserted with"""
+
+        return self._items[item][0]
+
+    def query_point(self, x : int, y : int) -> list[Hashable]:
+        """Get every item whose rect contains the point"""
+
+        size = self._cell_size
+        bucket = self._cells.get((int(x) // size, int(y) // size))
+
+        if bucket is None:
+            return []
+
+        found = []
+
+        for item in bucket:
+            i_x, i_y, i_w, i_h = self._items[item][0]
+            if i_x <= x < i_x + i_w and i_y <= y < i_y + i_h:
+                found.append(item)
+
+        return found
+
+    def query_rect(self, rect : Any) -> set[Hashable]:
+        """Get every item whose rect overlaps rect"""
+
+        x, y, w, h = (int(v) for v in rect)
+        found = set()
+
+        for cell in self._cells_of((x, y, w, h)):
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                continue
+
+            for item in bucket:
+                i_x, i_y, i_w, i_h = self._items[item][0]
+                if i_x < x + w and x < i_x + i_w and i_y < y + h and y < i_y + i_h:
+                    found.add(item)
+
+        return found
+
+    def pairs(self) -> Iterator[tuple[Hashable, Hashable]]:
+        """Get every pair of items whose rects overlap, once each.
+
+        A pair is only reported by the cell that holds the top left corner of the overlap, so no set is needed to drop duplicates."""
+
+        size = self._cell_size
+        items = self._items
+
+        for (c_x, c_y), bucket in self._cells.items():
+            if len(bucket) < 2:
+                continue
+
+            members = [(item, items[item][0]) for item in bucket]
+
+            for index, (a, (a_x, a_y, a_w, a_h)) in enumerate(members):
+                for b, (b_x, b_y, b_w, b_h) in members[index + 1:]:
+                    if not (a_x < b_x + b_w and b_x < a_x + a_w and a_y < b_y + b_h and b_y < a_y + a_h):
+                        continue
+
+                    if max(a_x, b_x) // size == c_x and max(a_y, b_y) // size == c_y:
+                        yield (a, b)
+
+    def clear(self) -> None:
+        """Remove every item from the grid"""
+
+        self._cells.clear()
+        self._items.clear()
+
+    def __contains__(self, item : Hashable) -> bool:
+        return item in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._items)
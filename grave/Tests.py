@@ -1,8 +1,9 @@
 """test your objects using the tester"""
 
 from collections.abc import Callable
+from gc import collect
 
-from .Core import Thing
+from .Core import Thing, Signal, signal
 
 class GraveTester(Thing):
     """Automatically test every single method in a class that inherits from GraveTester"""
@@ -59,3 +60,95 @@ class GraveTesterTester(GraveTester):
     def test_tester(self):
         """Test if the a_test method is in the dictionary"""
         return "test_tester" in dir(self)
+
+
+_hook_calls = []
+
+
+class _Emitter(Thing):
+    """An object with signals, for SignalTester"""
+
+    changed = Signal(None)
+    measured = Signal(None, after=len)
+    noted = Signal(None, before=lambda *args: _hook_calls.append(args))
+
+    def __init__(self):
+        super().__init__()
+
+        self.seen = []
+
+    @signal
+    def hooked(self, value):
+        self.seen.append(value)
+
+
+class _Receiver:
+    """A slot owner that can be collected, for SignalTester"""
+
+    def __init__(self, calls : list):
+        self._calls = calls
+
+    def receive(self, value):
+        self._calls.append(value)
+
+
+class SignalTester(GraveTester):
+    """Test that class body signals are per object, and how their slots and hooks are called"""
+
+    def test_signals_are_per_instance(self):
+        """Emitting one object's signal does not call slots connected on another object"""
+        a, b = _Emitter(), _Emitter()
+        calls = []
+
+        Signal.connect(a.changed, calls.append)
+        b.changed.emit(1)
+        a.changed.emit(2)
+
+        return calls == [2] and a.changed is a.changed and a.changed is not b.changed
+
+    def test_slots_are_called_once_in_order(self):
+        """Connecting a slot twice calls it once, and slots are called in the order they were connected"""
+        emitter = _Emitter()
+        calls = []
+        first = lambda value: calls.append(("first", value))
+        second = lambda value: calls.append(("second", value))
+
+        Signal.connect(emitter.changed, first)
+        Signal.connect(emitter.changed, second)
+        Signal.connect(emitter.changed, first)
+        emitter.changed.emit(1)
+
+        return calls == [("first", 1), ("second", 1)]
+
+    def test_weak_slots_do_not_keep_objects_alive(self):
+        """A weak slot is dropped once its object is collected"""
+        emitter = _Emitter()
+        calls = []
+        receiver = _Receiver(calls)
+
+        Signal.connect(emitter.changed, receiver.receive, weak=True)
+        emitter.changed.emit(1)
+
+        del receiver
+        collect()
+        emitter.changed.emit(2)
+
+        return calls == [1] and emitter.changed.slots() == []
+
+    def test_decorated_hooks_are_bound(self):
+        """The method decorated with @signal runs with the object the signal belongs to"""
+        a, b = _Emitter(), _Emitter()
+
+        a.hooked.emit(1)
+
+        return a.seen == [1] and b.seen == []
+
+    def test_plain_hooks_are_not_bound(self):
+        """Builtin and plain function hooks get only the emitted arguments"""
+        emitter = _Emitter()
+        _hook_calls.clear()
+
+        emitter.measured.emit("ab")
+        emitter.noted.emit(1)
+
+        return _hook_calls == [(1,)]
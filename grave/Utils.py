@@ -1,17 +1,26 @@
 from typing import Any
 
+from .Capabilities import default_capability_registry
 from .Core import Infix
 
-from .Implements import Implement
-from .CImplements import CImplement
+# The compiled implements are optional. Without the built extension the pure Python implements stand in for them.
+try:
+    from .CImplements import CImplement, CImplementsPosition, CImplements2DMove, CImplementsSprite
+    HAS_CIMPLEMENTS = True
+except ImportError:
+    from .Implements import (
+        Implement as CImplement,
+        ImplementsPosition as CImplementsPosition,
+        Implements2DMove as CImplements2DMove,
+        ImplementsSprite as CImplementsSprite,
+        )
+    HAS_CIMPLEMENTS = False
 
-def __implements__(cls : Any, implement : type) -> True:
-    if not issubclass(implement, Implement) and not issubclass(implement, CImplement):
-        raise ValueError(f"Supplied implement \'{implement.__name__}\' is not of Implement type")
+_GRAVE_cached_implements = default_capability_registry.cached
 
-    if type(cls) == type:
-        return implement in cls.__mro__
+def __implements__(cls : Any, implement : type) -> True:
+    result = _GRAVE_cached_implements(cls if type(cls) is type else type(cls), implement)
 
-    return implement in type(cls).__mro__
+    return default_capability_registry.implements(cls, implement) if result is None else result
 
 implements = Infix(__implements__)
@@ -0,0 +1,235 @@
+"""An entity registry that groups GameObjects into archetypes by their tags"""
+
+from typing import Any, Iterator
+
+from .Core import Thing, GameObject, Tag
+
+
+class Archetype(Thing):
+    """Every entity with exactly the same set of tag names. Tags are stored column by column."""
+
+    def __init__(self, names : frozenset[str]):
+        """Initialize an empty archetype for the given tag names"""
+
+        super().__init__()
+
+        self._names : frozenset[str] = names
+        self._entities : list[GameObject] = []
+        self._rows : dict[GameObject, int] = dict()
+        self._columns : dict[str, list[Tag]] = {name: [] for name in names}
+
+    @property
+    def names(self) -> frozenset[str]:
+        """The tag names shared by every entity of the archetype"""
+
+        return self._names
+
+    @property
+    def entities(self) -> list[GameObject]:
+        """The entities of the archetype, in row order"""
+
+        return self._entities
+
+    def column(self, name : str) -> list[Tag]:
+        """The tags with the given name, in row order"""
+
+        return self._columns[name]
+
+    def append(self, entity : GameObject) -> None:
+        """Add a row for the entity"""
+
+        self._rows[entity] = len(self._entities)
+        self._entities.append(entity)
+
+        tags = entity.tags()
+        for name, column in self._columns.items():
+            column.append(tags[name])
+
+    def refresh(self, entity : GameObject) -> None:
+        """Store the entity's current tag objects in its row"""
+
+        row = self._rows[entity]
+        tags = entity.tags()
+
+        for name, column in self._columns.items():
+            column[row] = tags[name]
+
+    def remove(self, entity : GameObject) -> None:
+        """Remove the entity's row by moving the last row into its place"""
+
+        row = self._rows.pop(entity)
+        last = len(self._entities) - 1
+
+        if row != last:
+            moved = self._entities[last]
+            self._entities[row] = moved
+            self._rows[moved] = row
+
+            for column in self._columns.values():
+                column[row] = column[last]
+
+        self._entities.pop()
+
+        for column in self._columns.values():
+            column.pop()
+
+    def __contains__(self, entity : GameObject) -> bool:
+        return entity in self._rows
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+
+class Query(Thing):
+    """The cached result of World.query. It stays up to date as entities gain and lose tags.
+
+    Changing tags while iterating a query moves entities between archetypes, so iterate over a copy in that case."""
+
+    def __init__(self, names : tuple[str, ...]):
+        """Initialize an empty query for entities having every one of the given tag names"""
+
+        super().__init__()
+
+        self._names : tuple[str, ...] = names
+        self._required : frozenset[str] = frozenset(names)
+        self._archetypes : list[Archetype] = []
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        """The tag names the query asks for"""
+
+        return self._names
+
+    def matches(self, archetype : Archetype) -> bool:
+        """Does every entity of the archetype match the query?"""
+
+        return self._required <= archetype.names
+
+    def _add_archetype(self, archetype : Archetype) -> None:
+        self._archetypes.append(archetype)
+
+    def archetypes(self) -> list[Archetype]:
+        """Every archetype that matches the query"""
+
+        return self._archetypes
+
+    def rows(self) -> Iterator[tuple[Any, ...]]:
+        """Iterate over (entity, tag, ...) tuples with the tags in the order they were asked for"""
+
+        for archetype in self._archetypes:
+            if archetype.entities:
+                yield from zip(archetype.entities, *(archetype.column(name) for name in self._names))
+
+    def __iter__(self) -> Iterator[GameObject]:
+        for archetype in self._archetypes:
+            yield from archetype.entities
+
+    def __len__(self) -> int:
+        return sum(len(archetype) for archetype in self._archetypes)
+
+
+class World(Thing):
+    """Registers GameObjects and finds them by tag without scanning all of them"""
+
+    def __init__(self):
+        """Initialize an empty world"""
+
+        super().__init__()
+
+        self._archetypes : dict[frozenset[str], Archetype] = dict()
+        self._entity_archetypes : dict[GameObject, Archetype] = dict()
+        self._queries : dict[tuple[str, ...], Query] = dict()
+
+    def _archetype(self, names : frozenset[str]) -> Archetype:
+        """Get the archetype for the tag names, creating it and adding it to the matching queries"""
+
+        archetype = self._archetypes.get(names)
+
+        if archetype is None:
+            archetype = Archetype(names)
+            self._archetypes[names] = archetype
+
+            for query in self._queries.values():
+                if query.matches(archetype):
+                    query._add_archetype(archetype)
+
+        return archetype
+
+    def add(self, entity : GameObject) -> None:
+        """Register an entity in the world"""
+
+        if entity.world() is self:
+            return
+
+        if entity.world() is not None:
+            raise ValueError(f"{entity.name()} already belongs to another world")
+
+        archetype = self._archetype(frozenset(entity.tags()))
+        archetype.append(entity)
+
+        self._entity_archetypes[entity] = archetype
+        entity._world = self
+
+    def remove(self, entity : GameObject) -> bool:
+        """Unregister an entity from the world"""
+
+        archetype = self._entity_archetypes.pop(entity, None)
+
+        if archetype is None:
+            return False
+
+        archetype.remove(entity)
+        entity._world = None
+
+        return True
+
+    def retag(self, entity : GameObject) -> None:
+        """Move the entity to the archetype matching its current tags. GameObject calls this when its tags change."""
+
+        old = self._entity_archetypes[entity]
+        names = frozenset(entity.tags())
+
+        if old.names == names:
+            old.refresh(entity)
+            return
+
+        old.remove(entity)
+
+        new = self._archetype(names)
+        new.append(entity)
+        self._entity_archetypes[entity] = new
+
+    def archetype_of(self, entity : GameObject) -> Archetype:
+        """Get the archetype the entity is stored in"""
+
+        return self._entity_archetypes[entity]
+
+    def archetypes(self) -> list[Archetype]:
+        """Every archetype created so far"""
+
+        return list(self._archetypes.values())
+
+    def query(self, *names : str) -> Query:
+        """Get the cached query for entities having every one of the given tag names"""
+
+        query = self._queries.get(names)
+
+        if query is None:
+            query = Query(names)
+
+            for archetype in self._archetypes.values():
+                if query.matches(archetype):
+                    query._add_archetype(archetype)
+
+            self._queries[names] = query
+
+        return query
+
+    def __contains__(self, entity : GameObject) -> bool:
+        return entity in self._entity_archetypes
+
+    def __len__(self) -> int:
+        return len(self._entity_archetypes)
+
+    def __iter__(self) -> Iterator[GameObject]:
+        return iter(self._entity_archetypes)
@@ -1,22 +1,36 @@
 """Init file for the grave package."""
 
-# Any module file in the current directory of this file will
-# be added to a list if it does not begin with an underscore.
+# Submodules are imported the first time they are used as attributes of the
+# package, so importing grave for GameObject or Signal does not pay for pygame.
 
-from os import listdir, path
+from importlib import import_module
 
-_GRAVE_this = path.split(path.abspath(__file__))[0]
-_GRAVE_file_list = listdir(_GRAVE_this)
-_GRAVE_exclude = [
-    f
-    for f in _GRAVE_file_list
-    if f.startswith("_")
+__all__ = [
+    "Assets",
+    "Capabilities",
+    "Collision",
+    "Constants",
+    "Core",
+    "Game",
+    "Gui",
+    "Implements",
+    "Masks",
+    "Movement",
+    "Profiler",
+    "Render",
+    "Spatial",
+    "Tests",
+    "Utils",
+    "World",
     ]
 
-_GRAVE_modules = [
-            path.splitext(f)[0]
-            for f in _GRAVE_file_list
-            if (f not in _GRAVE_exclude and path.splitext(f)[1] == ".py")
-            ]
 
-__all__ = sorted(_GRAVE_modules)
+def __getattr__(name : str):
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return import_module(f".{name}", __name__)
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
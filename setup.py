@@ -1,14 +1,19 @@
 from setuptools import setup, Extension
-from Cython.Build import cythonize
+
+# Build from the .pyx when Cython is installed, otherwise from the generated C file that ships with the source.
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
 
 
 extensions = [
-    Extension("grave.CImplements", ["grave/CImplements.pyx"])
+    Extension("grave.CImplements", ["grave/CImplements.pyx" if cythonize else "grave/CImplements.c"], optional=True)
     ]
 
 setup(
     name = "PyGrave",
     version="0.0.1",
     packages=["grave"],
-    ext_modules=cythonize(extensions),
+    ext_modules=cythonize(extensions, compiler_directives={"language_level": "3"}) if cythonize else extensions,
     )
@@ -14,22 +14,27 @@ class StaticWidgetTestScene(Scene):
 
         _this_dir_ = dirname(abspath(__file__))
 
-        img = pygame.image.load(join(_this_dir_, "window.png")).convert_alpha()
-        img_2 = pygame.image.load(join(_this_dir_, "ship.png")).convert_alpha()
-        img_button = pygame.image.load(join(_this_dir_, "button.png")).convert_alpha()
+        assets = global_things["assets"]
+        window_path = join(_this_dir_, "window.png")
+        ship_path = join(_this_dir_, "ship.png")
+        button_path = join(_this_dir_, "button.png")
+
+        img = assets.image(window_path)
+        img_2 = assets.image(ship_path)
+        img_button = assets.image(button_path)
         pos = ((1920 // 2) - (512 // 2), (1080 // 2) - (512 // 2))
 
         button_pos = (img.get_width() // 2 - img_button.get_width() // 2, img.get_height() // 2 - img_button.get_height() // 2)
 
-        self.mask = pygame.mask.from_surface(img)
-        self.mask_2 = pygame.mask.from_surface(img_2)
+        self.mask = assets.mask(window_path)
+        self.mask_2 = assets.mask(ship_path)
 
         self._show_masks = False
         self._overlap_mask = None
 
-        self.b = StaticWindowWidget(surface=screen, image=img_2)
-        self.a = StaticWindowWidget(surface=screen, image=img, position=pos)
-        self.button = AbstractButtonWidget(surface=screen, image=img_button, position=button_pos)
+        self.b = StaticWindowWidget(surface=screen, image=img_2, mask=self.mask_2)
+        self.a = StaticWindowWidget(surface=screen, image=img, position=pos, mask=self.mask)
+        self.button = AbstractButtonWidget(surface=screen, image=img_button, position=button_pos, mask=assets.mask(button_path))
 
         Signal.connect(self.button.on_hover, lambda : print("Hovering entered"))
         Signal.connect(self.button.on_hover_exit, lambda : print("Hovering exited"))
@@ -41,6 +46,7 @@ class StaticWidgetTestScene(Scene):
 
         self.a.add_widget(self.b)
         self.a.add_widget(self.button)
+        self.a.set_dirty_rects(self.dirty_rects)
 
     def draw(self):
         self._screen.fill((255, 0, 0))
@@ -60,19 +66,20 @@ class StaticWidgetTestScene(Scene):
         o_y = self.a.y - self.b.y
         self._overlap_mask = self.mask_2.overlap_mask(self.mask, (o_x, o_y))
 
+        if self._show_masks:
+            self.mark_dirty()
+
         self.a.update()
 
     def process_event(self, event):
         super().process_event(event)
 
-        self.button.process_events(event)
+        self.a.process_events(event)
 
         if event.type == pygame.KEYDOWN and event.key == pygame.K_m:
             self._show_masks = not self._show_masks
+            self.mark_dirty()
 
         if event.type == pygame.MOUSEBUTTONUP:
             m_x, m_y = event.pos
             self.a.position = (m_x - (512 // 2), m_y - (512 // 2))
-            for widget in self.a._widgets:
-                x, y = self.a.position
-                widget.position = (x + (self.a._image.get_width() // 2) - (widget._image.get_width() // 2), y + (self.a._image.get_width() // 2) - (widget._image.get_height() // 2))